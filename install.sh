@@ -4,7 +4,7 @@ set -e
 echo "=== KySettings Installer ==="
 
 # All dependencies — install everything upfront so nothing needs internet later
-ALL_DEPS=(python3 python3-gi gir1.2-adw-1 redsocks xdotool xclip wl-clipboard)
+ALL_DEPS=(python3 python3-gi gir1.2-adw-1 dconf-cli redsocks xdotool xclip wl-clipboard)
 MISSING=()
 for pkg in "${ALL_DEPS[@]}"; do
     if ! dpkg -s "$pkg" &>/dev/null; then
@@ -21,6 +21,9 @@ fi
 sudo systemctl stop redsocks 2>/dev/null || true
 sudo systemctl disable redsocks 2>/dev/null || true
 
+# Quit a resident instance so the new version is what starts next
+gapplication action com.ky.settings quit 2>/dev/null || true
+
 # Create directories
 mkdir -p ~/.local/bin
 mkdir -p ~/.local/share/applications
@@ -36,8 +39,13 @@ chmod +x ~/.local/bin/pdanet-proxy
 cp scripts/pdanet ~/.local/bin/pdanet
 chmod +x ~/.local/bin/pdanet
 
-cp scripts/minecraft-auto-mute ~/.local/bin/minecraft-auto-mute.sh
-chmod +x ~/.local/bin/minecraft-auto-mute.sh
+cp scripts/kyx11.py ~/.local/bin/kyx11.py
+
+# focus-audio replaces minecraft-auto-mute(.sh)
+pkill -f minecraft-auto-mute 2>/dev/null || true
+rm -f ~/.local/bin/minecraft-auto-mute ~/.local/bin/minecraft-auto-mute.sh
+cp scripts/focus-audio ~/.local/bin/focus-audio
+chmod +x ~/.local/bin/focus-audio
 
 cp scripts/speech-lock ~/.local/bin/speech-lock
 chmod +x ~/.local/bin/speech-lock
@@ -45,6 +53,16 @@ chmod +x ~/.local/bin/speech-lock
 cp scripts/bt-reset ~/.local/bin/bt-reset
 chmod +x ~/.local/bin/bt-reset
 
+# Privileged helper: D-Bus activated on the system bus, authorized through
+# polkit. It runs its own root-owned copies of the scripts, never ~/.local/bin.
+sudo pkill -f /usr/local/lib/kysettings/kysettings-helper 2>/dev/null || true
+sudo install -d /usr/local/lib/kysettings
+sudo install -m 755 scripts/kysettings-helper scripts/pdanet-proxy scripts/bt-reset /usr/local/lib/kysettings/
+sudo install -m 644 system/com.ky.settings.Helper.service /usr/share/dbus-1/system-services/
+sudo install -m 644 system/com.ky.settings.Helper.conf /usr/share/dbus-1/system.d/
+sudo install -m 644 system/com.ky.settings.policy /usr/share/polkit-1/actions/
+sudo systemctl reload dbus 2>/dev/null || true
+
 # Ensure ~/.local/bin is in PATH
 if ! echo "$PATH" | grep -q "$HOME/.local/bin"; then
     echo 'export PATH="$HOME/.local/bin:$PATH"' >> ~/.bashrc
@@ -60,6 +78,14 @@ gtk-update-icon-cache ~/.local/share/icons/hicolor/ 2>/dev/null || true
 cp com.ky.settings.desktop ~/.local/share/applications/
 update-desktop-database ~/.local/share/applications/ 2>/dev/null || true
 
+# D-Bus activation: the dash starts (or re-presents) one resident instance
+mkdir -p ~/.local/share/dbus-1/services
+cat > ~/.local/share/dbus-1/services/com.ky.settings.service <<EOF
+[D-BUS Service]
+Name=com.ky.settings
+Exec=$HOME/.local/bin/kysettings --gapplication-service
+EOF
+
 echo ""
 echo "Installed successfully!"
 
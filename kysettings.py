@@ -2,49 +2,2524 @@
 """KySettings - Custom GNOME Settings"""
 
 import gi
-gi.require_version('Gtk', '4.0')
-gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw, Gio, GLib
+from gi.repository import Gio, GLib, GObject
 import subprocess
 import os
 import pathlib
+import shutil
+import json
+import re
+import array
+import collections
+import concurrent.futures
+import ctypes
+import ctypes.util
+import fcntl
+import functools
+import ipaddress
+import socket
+import struct
+import sys
+import threading
+import heapq
+import itertools
+import uuid
+import time
 from datetime import datetime, timedelta
 
 FIRST_RUN_FLAG = pathlib.Path.home() / ".config" / "kysettings" / ".installed"
 
+# Rules for scripts/focus-audio (same defaults as the script's DEFAULT_RULES)
+AUDIO_RULES_FILE = pathlib.Path.home() / ".config" / "kysettings" / "audio-rules.json"
+DEFAULT_AUDIO_RULES = [{
+    "name": "Minecraft",
+    "wm_class": "minecraft",
+    "title": "Minecraft",
+    "process": "",
+    "streams": ["java"],
+    "focused": 100,
+    "unfocused": 0,
+    "fade_ms": 0,
+}]
+
 # Custom keybinding paths
 KEYBINDING_PATH = "/org/gnome/settings-daemon/plugins/media-keys/custom-keybindings"
 KEYBINDING_SCHEMA = "org.gnome.settings-daemon.plugins.media-keys.custom-keybinding"
 
+# =============================================================================
+# TRAFFIC ACCOUNTING
+# =============================================================================
+
+# Must match the REDSOCKS chain in scripts/pdanet-proxy: these destinations
+# RETURN early, everything else on these ports is redirected to redsocks.
+REDSOCKS_DPORTS = {53, 80, 443, 8080, 8443}
+REDSOCKS_BYPASS_NETS = [ipaddress.ip_network(n) for n in (
+    "0.0.0.0/8", "10.0.0.0/8", "100.64.0.0/10", "127.0.0.0/8", "169.254.0.0/16",
+    "172.16.0.0/12", "192.168.0.0/16", "224.0.0.0/4", "240.0.0.0/4",
+)]
+
+# netlink / sock_diag constants (linux/sock_diag.h, linux/inet_diag.h)
+_NETLINK_SOCK_DIAG = 4
+_SOCK_DIAG_BY_FAMILY = 20
+_NLM_F_REQUEST_DUMP = 0x1 | 0x300
+_NLMSG_ERROR = 2
+_NLMSG_DONE = 3
+_INET_DIAG_INFO = 2
+_INET_DIAG_REQ_BYTECODE = 1
+_INET_DIAG_BC_JMP = 1
+_INET_DIAG_BC_D_COND = 8
+_INET_DIAG_BC_D_EQ = 12
+_TCP_STATES_NO_LISTEN = 0xFFF & ~(1 << 10)
+_SIOCGIFADDR = 0x8915
+
+
+# inet_diag bytecode, composed the way ss(8) does it: a filter of length n
+# accepts by running off its end and rejects by jumping to n + 4. Every op
+# is (code, yes, no) with relative byte offsets.
+
+def _bc_op(code, yes, no):
+    return struct.pack("=BBH", code, yes, no)
+
+
+def _bc_dport(port):
+    return _bc_op(_INET_DIAG_BC_D_EQ, 8, 12) + _bc_op(0, 0, port)
+
+
+def _bc_dnet(net):
+    # inet_diag_hostcond: family, prefix_len, port (-1 = any), address
+    cond = struct.pack("=BB2xi", socket.AF_INET, net.prefixlen, -1) + net.network_address.packed
+    return _bc_op(_INET_DIAG_BC_D_COND, 16, 20) + cond
+
+
+def _bc_not(a):
+    return a + _bc_op(_INET_DIAG_BC_JMP, 4, 8)
+
+
+def _bc_or(a, b):
+    return a + _bc_op(_INET_DIAG_BC_JMP, 4, len(b) + 4) + b
+
+
+def _bc_and(a, b):
+    # a's rejects must now jump past b as well
+    a = bytearray(a)
+    off = 0
+    while off < len(a):
+        code, yes, no = struct.unpack_from("=BBH", a, off)
+        if no == len(a) - off + 4:
+            struct.pack_into("=BBH", a, off, code, yes, no + len(b))
+        off += yes
+    return bytes(a) + b
+
+
+def redsocks_bytecode():
+    """Kernel-side filter for the flows redsocks redirects: one of
+    REDSOCKS_DPORTS, to an address outside REDSOCKS_BYPASS_NETS."""
+    ports = functools.reduce(_bc_or, [_bc_dport(p) for p in sorted(REDSOCKS_DPORTS)])
+    public = functools.reduce(_bc_and, [_bc_not(_bc_dnet(n)) for n in REDSOCKS_BYPASS_NETS])
+    return _bc_and(ports, public)
+
+
+REDSOCKS_BYTECODE = redsocks_bytecode()
+
+
+class RingBuffer:
+    """Fixed-size ring of integer samples with an O(1) running total."""
+
+    def __init__(self, size):
+        self.size = size
+        self.data = array.array('q', bytes(8 * size))
+        self.head = 0
+        self.total = 0
+
+    def push(self, value):
+        self.total += value - self.data[self.head]
+        self.data[self.head] = value
+        self.head = (self.head + 1) % self.size
+
+    def last(self):
+        return self.data[self.head - 1]
+
+    def values(self):
+        """Samples ordered oldest to newest."""
+        return self.data[self.head:] + self.data[:self.head]
+
+
+class Talker:
+    """Byte history and live connection count for one process or destination."""
+
+    __slots__ = ("name", "history", "total", "connections", "idle")
+
+    def __init__(self, name, size):
+        self.name = name
+        self.history = RingBuffer(size)
+        self.total = 0
+        self.connections = 0
+        self.idle = 0
+
+
+class FlowMonitor:
+    """Per-process and per-destination counters for redsocks-redirected TCP.
+
+    Each tick dumps IPv4 TCP sockets with their tcp_info straight from the
+    kernel over NETLINK_SOCK_DIAG (no root, no subprocess), with a bytecode
+    filter so only the redirected flows come back, and only keeps deltas
+    against the previous tick, keyed by socket cookie. Socket inode
+    to process lookups are cached, so /proc is only walked when a socket
+    shows up that hasn't been attributed yet.
+    """
+
+    HISTORY = 60
+    MAX_TALKERS = 256
+
+    def __init__(self):
+        self.sock = None
+        self.flows = {}          # cookie -> (bytes_sent, bytes_received)
+        self.inode_owner = {}    # socket inode -> process label
+        self.owner_pids = {}     # process label -> pid last seen owning a socket
+        self.processes = {}
+        self.destinations = {}
+        self.rx = RingBuffer(self.HISTORY)
+        self.tx = RingBuffer(self.HISTORY)
+        self.iface = None
+        self.iface_prev = None
+        self.primed = False
+
+    def reset(self):
+        self.close()
+        self.__init__()
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    # ── kernel socket dump ───────────────────────────────────────────────────
+
+    def _dump(self):
+        """Yield (cookie, dest, dport, inode, uid, sent, received) per TCP socket."""
+        if self.sock is None:
+            self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, _NETLINK_SOCK_DIAG)
+        req = struct.pack("=BBBBI", socket.AF_INET, socket.IPPROTO_TCP,
+                          1 << (_INET_DIAG_INFO - 1), 0, _TCP_STATES_NO_LISTEN) + bytes(48)
+        req += struct.pack("=HH", 4 + len(REDSOCKS_BYTECODE), _INET_DIAG_REQ_BYTECODE) + REDSOCKS_BYTECODE
+        hdr = struct.pack("=IHHII", 16 + len(req), _SOCK_DIAG_BY_FAMILY, _NLM_F_REQUEST_DUMP, 0, 0)
+        self.sock.send(hdr + req)
+
+        while True:
+            data = self.sock.recv(65536)
+            off = 0
+            while off + 16 <= len(data):
+                length, msg_type = struct.unpack_from("=IH", data, off)
+                if msg_type == _NLMSG_ERROR:
+                    errno = -struct.unpack_from("=i", data, off + 16)[0]
+                    if errno:
+                        raise OSError(errno, os.strerror(errno))
+                    return
+                if msg_type == _NLMSG_DONE or length < 16:
+                    return
+                msg = off + 16
+                dport = struct.unpack_from("!H", data, msg + 6)[0]
+                dst = socket.inet_ntoa(data[msg + 24:msg + 28])
+                cookie = struct.unpack_from("=Q", data, msg + 44)[0]
+                uid, inode = struct.unpack_from("=II", data, msg + 64)
+                attr = msg + 72
+                while attr + 4 <= off + length:
+                    alen, atype = struct.unpack_from("=HH", data, attr)
+                    if alen < 4:
+                        break
+                    if atype == _INET_DIAG_INFO and alen >= 4 + 136:
+                        # tcpi_bytes_acked / tcpi_bytes_received
+                        sent, recv = struct.unpack_from("=QQ", data, attr + 4 + 120)
+                        yield cookie, dst, dport, inode, uid, sent, recv
+                        break
+                    attr += (alen + 3) & ~3
+                off += (length + 3) & ~3
+
+    # ── socket -> process attribution ────────────────────────────────────────
+
+    def _scan_fds(self, pid, wanted):
+        """Map any of the wanted socket inodes held by pid to its process label."""
+        fd_dir = f"/proc/{pid}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+            with open(f"/proc/{pid}/comm") as f:
+                label = f.read().strip()
+        except OSError:
+            return 0
+        found = 0
+        for fd in fds:
+            try:
+                target = os.readlink(f"{fd_dir}/{fd}")
+            except OSError:
+                continue
+            if target.startswith("socket:["):
+                inode = int(target[8:-1])
+                if inode in wanted:
+                    self.inode_owner[inode] = label
+                    self.owner_pids[label] = pid
+                    wanted.discard(inode)
+                    found += 1
+        return found
+
+    def _attribute(self, inodes):
+        """Resolve unknown inodes, trying processes that already own flows first."""
+        wanted = {i for i in inodes if i and i not in self.inode_owner}
+        if not wanted:
+            return
+        for pid in list(self.owner_pids.values()):
+            self._scan_fds(pid, wanted)
+            if not wanted:
+                return
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                self._scan_fds(entry, wanted)
+                if not wanted:
+                    return
+        for inode in wanted:
+            self.inode_owner[inode] = None
+
+    # ── tether interface counters ────────────────────────────────────────────
+
+    def _find_iface(self):
+        """Name of the interface holding a 192.168.49.x (PDANet) address."""
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for _, name in socket.if_nameindex():
+                try:
+                    res = fcntl.ioctl(probe.fileno(), _SIOCGIFADDR,
+                                      struct.pack("256s", name.encode()[:15]))
+                except OSError:
+                    continue
+                if socket.inet_ntoa(res[20:24]).startswith("192.168.49."):
+                    return name
+        finally:
+            probe.close()
+        return None
+
+    def _iface_counters(self):
+        if self.iface is None:
+            self.iface = self._find_iface()
+            if self.iface is None:
+                return None
+        try:
+            base = f"/sys/class/net/{self.iface}/statistics"
+            with open(f"{base}/rx_bytes") as f:
+                rx = int(f.read())
+            with open(f"{base}/tx_bytes") as f:
+                tx = int(f.read())
+            return rx, tx
+        except OSError:
+            self.iface = None
+            return None
+
+    # ── per-second tick ──────────────────────────────────────────────────────
+
+    def tick(self):
+        """Take one sample. Cheap enough to run every second."""
+        flows = {}
+        samples = []
+        try:
+            for cookie, dst, dport, inode, uid, sent, recv in self._dump():
+                prev = self.flows.get(cookie)
+                if prev is None:
+                    delta = sent + recv if self.primed else 0
+                else:
+                    delta = max(0, sent - prev[0]) + max(0, recv - prev[1])
+                flows[cookie] = (sent, recv)
+                samples.append((inode, uid, f"{dst}:{dport}", delta))
+        except OSError as e:
+            print(f"Flow dump failed: {e}")
+            self.close()
+
+        self._attribute([s[0] for s in samples])
+        live = {s[0] for s in samples}
+        self.inode_owner = {i: o for i, o in self.inode_owner.items() if i in live}
+
+        per_proc = {}
+        per_dest = {}
+        for inode, uid, dest, delta in samples:
+            proc = self.inode_owner.get(inode) or f"uid {uid}"
+            for bucket, key in ((per_proc, proc), (per_dest, dest)):
+                entry = bucket.setdefault(key, [0, 0])
+                entry[0] += delta
+                entry[1] += 1
+        self._push(self.processes, per_proc)
+        self._push(self.destinations, per_dest)
+        self.flows = flows
+        self.primed = True
+
+        counters = self._iface_counters()
+        if counters and self.iface_prev:
+            self.rx.push(max(0, counters[0] - self.iface_prev[0]))
+            self.tx.push(max(0, counters[1] - self.iface_prev[1]))
+        else:
+            self.rx.push(0)
+            self.tx.push(0)
+        self.iface_prev = counters
+
+    def _push(self, talkers, sample):
+        for name, (delta, conns) in sample.items():
+            talker = talkers.get(name)
+            if talker is None:
+                if len(talkers) >= self.MAX_TALKERS:
+                    continue
+                talker = talkers[name] = Talker(name, self.HISTORY)
+            talker.history.push(delta)
+            talker.total += delta
+            talker.connections = conns
+            talker.idle = 0
+        for name in [n for n in talkers if n not in sample]:
+            talker = talkers[name]
+            talker.history.push(0)
+            talker.connections = 0
+            talker.idle += 1
+            if talker.idle >= self.HISTORY:
+                del talkers[name]
+
+    def top(self, talkers, n=5):
+        """Talkers with the most bytes over the history window."""
+        active = [t for t in talkers.values() if t.history.total or t.connections]
+        active.sort(key=lambda t: t.history.total, reverse=True)
+        return active[:n]
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+# =============================================================================
+# COMMAND TRACE
+# =============================================================================
+
+TRACE_SIZE = 500         # most recent external calls kept in memory
+TRACE_STDERR_CHARS = 400  # tail of stderr kept per call
+
+
+class CommandTrace:
+    """Bounded log of every external command the app runs.
+
+    run_command(), spawn_command(), AsyncProcess and RootHelper all record
+    here: argv, start time, duration, exit code (None for processes left
+    running detached), whether it timed out, and the tail of stderr. The
+    Diagnostics page shows summary() and exports to_json().
+    """
+
+    def __init__(self, size=TRACE_SIZE):
+        self.calls = collections.deque(maxlen=size)
+
+    def record(self, argv, started, seconds, code, timed_out=False, stderr=""):
+        self.calls.append({
+            "argv": [str(a) for a in argv],
+            "started": round(started, 3),
+            "ms": round(seconds * 1000, 1),
+            "exit": code,
+            "timeout": timed_out,
+            "stderr": (stderr or "").strip()[-TRACE_STDERR_CHARS:],
+        })
+
+    @staticmethod
+    def failed(call):
+        return call["timeout"] or call["exit"] not in (0, None)
+
+    @staticmethod
+    def command_key(argv):
+        """Group calls by program and subcommand: 'gsettings get', 'bluetoothctl show'."""
+        words = [os.path.basename(argv[0])] if argv else ["?"]
+        if len(argv) > 1 and not argv[1].startswith("-"):
+            words.append(os.path.basename(argv[1]))
+        return " ".join(words)
+
+    def summary(self):
+        """Per-command stats over the buffer, as a list of dicts."""
+        stats = {}
+        for call in list(self.calls):  # worker threads append concurrently
+            s = stats.setdefault(self.command_key(call["argv"]), {
+                "command": self.command_key(call["argv"]), "calls": 0, "failures": 0,
+                "timeouts": 0, "total_ms": 0.0, "max_ms": 0.0, "last_error": "",
+            })
+            s["calls"] += 1
+            s["total_ms"] += call["ms"]
+            s["max_ms"] = max(s["max_ms"], call["ms"])
+            if call["timeout"]:
+                s["timeouts"] += 1
+            if self.failed(call):
+                s["failures"] += 1
+                s["last_error"] = call["stderr"] or (
+                    "timed out" if call["timeout"] else f"exit {call['exit']}")
+        for s in stats.values():
+            s["avg_ms"] = round(s["total_ms"] / s["calls"], 1)
+            s["total_ms"] = round(s["total_ms"], 1)
+        return list(stats.values())
+
+    def slowest(self, n=8):
+        return sorted(self.summary(), key=lambda s: s["max_ms"], reverse=True)[:n]
+
+    def most_failing(self, n=8):
+        failing = [s for s in self.summary() if s["failures"]]
+        return sorted(failing, key=lambda s: (s["failures"], s["calls"]), reverse=True)[:n]
+
+    def to_json(self):
+        return json.dumps({
+            "exported": datetime.now().isoformat(timespec="seconds"),
+            "commands": self.summary(),
+            "calls": list(self.calls),
+        }, indent=2)
+
+
+TRACE = CommandTrace()
+
+
+def run_command(argv, timeout=5, **kwargs):
+    """subprocess.run() with output captured as text, recorded in TRACE.
+
+    Raises like subprocess.run (TimeoutExpired, OSError) after recording,
+    so callers keep their own fallbacks.
+    """
+    started, t0 = time.time(), time.monotonic()
+    try:
+        result = subprocess.run(argv, capture_output=True, text=True, timeout=timeout, **kwargs)
+    except subprocess.TimeoutExpired as e:
+        stderr = e.stderr.decode(errors="replace") if isinstance(e.stderr, bytes) else e.stderr
+        TRACE.record(argv, started, time.monotonic() - t0, None, True, stderr)
+        raise
+    except OSError as e:
+        TRACE.record(argv, started, time.monotonic() - t0, 127, stderr=str(e))
+        raise
+    TRACE.record(argv, started, time.monotonic() - t0, result.returncode, stderr=result.stderr)
+    return result
+
+
+def spawn_command(argv, **kwargs):
+    """subprocess.Popen() for fire-and-forget commands, recorded in TRACE."""
+    started, t0 = time.time(), time.monotonic()
+    try:
+        proc = subprocess.Popen(argv, **kwargs)
+    except OSError as e:
+        TRACE.record(argv, started, time.monotonic() - t0, 127, stderr=str(e))
+        raise
+    TRACE.record(argv, started, time.monotonic() - t0, None)
+    return proc
+
+
+# =============================================================================
+# MAIN-LOOP WATCHDOG
+# =============================================================================
+
+WATCHDOG_ENV = "KYSETTINGS_WATCHDOG"  # set to 1 (or a threshold in ms) to enable
+WATCHDOG_THRESHOLD_MS = 50
+WATCHDOG_HEARTBEAT_MS = 10
+
+
+class StallWatchdog:
+    """Opt-in detector for handlers that block the GTK main loop.
+
+    A heartbeat timeout on the main loop stamps the time every
+    WATCHDOG_HEARTBEAT_MS. A daemon thread checks the stamp, and once it
+    is older than the threshold it grabs the main thread's Python stack
+    with sys._current_frames() — the handler that is still running — then
+    waits for the next beat to learn how long the stall lasted. Stalls are
+    logged as they end and tallied per handler for report() and the
+    Diagnostics page.
+    """
+
+    def __init__(self, threshold_ms=WATCHDOG_THRESHOLD_MS, source=__file__):
+        self.threshold = threshold_ms / 1000
+        self.source = source  # the file whose functions count as handlers
+        self.main_thread = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.lock = threading.Lock()
+        self.stalls = {}  # handler -> {"handler", "where", "count", "total_ms", "max_ms"}
+        GLib.timeout_add(WATCHDOG_HEARTBEAT_MS, self._beat)
+        threading.Thread(target=self._watch, name="stall-watchdog", daemon=True).start()
+
+    @classmethod
+    def from_env(cls):
+        """A running watchdog if WATCHDOG_ENV is set, else None."""
+        value = os.environ.get(WATCHDOG_ENV, "")
+        if not value or value == "0":
+            return None
+        threshold = int(value) if value.isdigit() and int(value) > 1 else WATCHDOG_THRESHOLD_MS
+        print(f"Main-loop watchdog on, threshold {threshold} ms")
+        return cls(threshold)
+
+    def _beat(self):
+        self.last_beat = time.monotonic()
+        return True
+
+    def _watch(self):
+        poll = self.threshold / 2
+        while True:
+            time.sleep(poll)
+            beat = self.last_beat
+            if time.monotonic() - beat < self.threshold:
+                continue
+            handler, where = self._attribute(sys._current_frames().get(self.main_thread))
+            while self.last_beat == beat:
+                time.sleep(poll)
+            # An idle loop beats once per period, so only the excess is stall
+            self._record(handler, where, (self.last_beat - beat) * 1000 - WATCHDOG_HEARTBEAT_MS)
+
+    def _attribute(self, frame):
+        """(handler, innermost line of source) for the main thread's stack.
+
+        Outermost first the stack is <module>, then PyGObject's run()
+        override (gi/overrides), then whatever the main loop dispatched:
+        the handler is the first frame of ours past that boundary.
+        """
+        stack = []
+        while frame is not None:
+            stack.append(frame)
+            frame = frame.f_back
+        stack.reverse()
+        handler = "GTK (no Python handler)"
+        dispatched = False
+        for f in stack:
+            if f.f_code.co_filename != self.source:
+                dispatched = True
+            elif dispatched and f.f_code.co_name != "<lambda>":
+                handler = f.f_code.co_name
+                break
+        where = ""
+        for f in reversed(stack):
+            if f.f_code.co_filename == self.source:
+                where = f"{f.f_code.co_name}:{f.f_lineno}"
+                break
+        return handler, where
+
+    def _record(self, handler, where, ms):
+        with self.lock:
+            s = self.stalls.setdefault(handler, {
+                "handler": handler, "where": where, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+            })
+            s["count"] += 1
+            s["total_ms"] += ms
+            if ms >= s["max_ms"]:
+                s["max_ms"], s["where"] = ms, where
+        print(f"Main loop stalled {ms:.0f} ms in {handler} ({where})")
+
+    def worst(self, n=8):
+        with self.lock:
+            stalls = [dict(s) for s in self.stalls.values()]
+        return sorted(stalls, key=lambda s: s["total_ms"], reverse=True)[:n]
+
+    def report(self):
+        lines = ["Main-loop stalls by handler (count, total ms, max ms):"]
+        for s in self.worst(len(self.stalls)):
+            lines.append(f"  {s['handler']:<36} {s['count']:>4} {s['total_ms']:>9.0f} "
+                         f"{s['max_ms']:>7.0f}  {s['where']}")
+        return "\n".join(lines)
+
+
+# =============================================================================
+# ASYNC PROCESS RUNNER
+# =============================================================================
+
+class AsyncProcess:
+    """Run a command without blocking the main loop.
+
+    stdout (stderr merged in) is read line by line and handed to
+    on_line(text) as it arrives. on_done(ok, output) fires from
+    wait_check_async as soon as the process exits — ok is True for exit
+    status 0. Both callbacks run on the main loop.
+    """
+
+    # A helper that daemonizes may leave our pipe open in its child, so we
+    # only wait this long for EOF after exit before reporting completion.
+    EOF_GRACE_MS = 200
+
+    def __init__(self, argv, on_line=None, on_done=None):
+        self.argv = argv
+        self.on_line = on_line
+        self.on_done = on_done
+        self.lines = []
+        self.ok = False
+        self.finished = False
+        self.exited = False
+        self.eof = False
+        self.started, self.t0 = time.time(), time.monotonic()
+        self.cancellable = Gio.Cancellable()
+        try:
+            self.proc = Gio.Subprocess.new(
+                argv, Gio.SubprocessFlags.STDOUT_PIPE | Gio.SubprocessFlags.STDERR_MERGE
+            )
+        except GLib.Error as e:
+            self.proc = None
+            self.lines.append(e.message)
+            GLib.idle_add(self._finish)
+            return
+        self.stream = Gio.DataInputStream.new(self.proc.get_stdout_pipe())
+        self.stream.read_line_async(GLib.PRIORITY_DEFAULT, self.cancellable, self._on_line)
+        self.proc.wait_check_async(self.cancellable, self._on_exit)
+
+    def _on_line(self, stream, result):
+        try:
+            line, _ = stream.read_line_finish(result)
+        except GLib.Error:
+            line = None
+        if line is None:
+            self.eof = True
+            if self.exited:
+                self._finish()
+            return
+        text = line.decode(errors="replace").rstrip("\r")
+        self.lines.append(text)
+        if self.on_line and text.strip():
+            self.on_line(text.strip())
+        stream.read_line_async(GLib.PRIORITY_DEFAULT, self.cancellable, self._on_line)
+
+    def _on_exit(self, proc, result):
+        try:
+            self.ok = proc.wait_check_finish(result)
+        except GLib.Error:
+            self.ok = False
+        self.exited = True
+        if self.eof:
+            self._finish()
+        else:
+            GLib.timeout_add(self.EOF_GRACE_MS, self._finish)
+
+    def _finish(self):
+        if not self.finished:
+            self.finished = True
+            output = "\n".join(self.lines).strip()
+            TRACE.record(self.argv, self.started, time.monotonic() - self.t0,
+                         self._exit_code(), stderr="" if self.ok else output)
+            if self.on_done:
+                self.on_done(self.ok, output)
+        return False
+
+    def _exit_code(self):
+        if self.proc is None:
+            return 127  # couldn't be spawned
+        if self.proc.get_if_exited():
+            return self.proc.get_exit_status()
+        if self.proc.get_if_signaled():
+            return -self.proc.get_term_sig()
+        return None
+
+    def cancel(self):
+        """Stop reporting and terminate the process if it's still running."""
+        self.on_line = self.on_done = None
+        if self.proc and not self.exited:
+            self.proc.force_exit()
+
+
+# =============================================================================
+# WORKER POOL
+# =============================================================================
+
+WORKER_THREADS = 4
+
+
+class Task:
+    """Work submitted to a WorkerPool.
+
+    fn(*args) runs on a worker thread, then on_done(result, error) runs on
+    the main loop — error is the exception fn raised, or None. cancel()
+    skips a task that hasn't started yet and silences one that has: a
+    thread can't be interrupted, but its result is dropped.
+    """
+
+    __slots__ = ("fn", "args", "resource", "on_done", "cancelled")
+
+    def __init__(self, fn, args, resource, on_done):
+        self.fn = fn
+        self.args = args
+        self.resource = resource
+        self.on_done = on_done
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        self.on_done = None
+
+
+class WorkerPool:
+    """Bounded thread pool whose results are delivered on the GLib main loop.
+
+    Tasks naming the same resource run one at a time in submission order,
+    so two quick flips of one switch can't interleave; everything else
+    runs in parallel on up to WORKER_THREADS threads. With replace=True,
+    the resource's queued tasks are cancelled first — a switch flipped
+    back and forth only needs to reach its latest state.
+    """
+
+    def __init__(self, threads=WORKER_THREADS):
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            threads, thread_name_prefix="kysettings-worker")
+        self.running = {}  # resource -> Task in flight
+        self.waiting = {}  # resource -> deque of Tasks behind it
+
+    def submit(self, fn, *args, resource=None, on_done=None, replace=False):
+        task = Task(fn, args, resource, on_done)
+        if resource is not None and resource in self.running:
+            waiting = self.waiting.setdefault(resource, collections.deque())
+            if replace:
+                for queued in waiting:
+                    queued.cancel()
+                waiting.clear()
+            waiting.append(task)
+        else:
+            self._start(task)
+        return task
+
+    def _start(self, task):
+        if task.resource is not None:
+            self.running[task.resource] = task
+        future = self.executor.submit(task.fn, *task.args)
+        future.add_done_callback(lambda f: GLib.idle_add(self._finish, task, f))
+
+    def _finish(self, task, future):
+        if task.resource is not None:
+            del self.running[task.resource]
+            waiting = self.waiting.get(task.resource)
+            while waiting and waiting[0].cancelled:
+                waiting.popleft()
+            if waiting:
+                self._start(waiting.popleft())
+        error = future.exception()
+        if task.on_done:
+            task.on_done(None if error else future.result(), error)
+        elif error and not task.cancelled:
+            print(f"Background task {task.fn.__name__} failed: {error}")
+        return False
+
+
+# =============================================================================
+# PRIVILEGED HELPER
+# =============================================================================
+
+HELPER_NAME = "com.ky.settings.Helper"
+HELPER_PATH = "/com/ky/settings/Helper"
+HELPER_SERVICE_FILE = "/usr/share/dbus-1/system-services/com.ky.settings.Helper.service"
+APT_PROXY_CONF = "/etc/apt/apt.conf.d/99pdanet-proxy"
+
+
+class RootHelper:
+    """Runs root-only operations through scripts/kysettings-helper.
+
+    The helper is D-Bus activated on the system bus and authorizes every
+    call through polkit with auth_admin_keep, so a burst of toggles costs
+    one password prompt and no pkexec process each. call() reports like
+    AsyncProcess: on_line(text) receives the helper's Progress lines for
+    that method, on_done(ok, output) fires when the call returns. If the
+    helper isn't installed, the fallback argv runs under pkexec instead.
+    """
+
+    def __init__(self):
+        self.bus = None
+        self.listeners = {}  # method -> on_line
+        if not os.path.exists(HELPER_SERVICE_FILE):
+            return
+        try:
+            self.bus = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+        except GLib.Error:
+            return
+        self.bus.signal_subscribe(
+            HELPER_NAME, HELPER_NAME, "Progress", HELPER_PATH, None,
+            Gio.DBusSignalFlags.NONE, self._on_progress,
+        )
+
+    def _on_progress(self, conn, sender, path, iface, signal, params):
+        method, line = params.unpack()
+        on_line = self.listeners.get(method)
+        if on_line:
+            on_line(line)
+
+    def call(self, method, args, fallback, on_line=None, on_done=None):
+        """Invoke a helper method; args is a GLib.Variant tuple or None."""
+        if self.bus is None:
+            return AsyncProcess(["pkexec"] + fallback, on_line=on_line, on_done=on_done)
+        if on_line:
+            self.listeners[method] = on_line
+
+        started, t0 = time.time(), time.monotonic()
+
+        def reply(conn, result):
+            if self.listeners.get(method) is on_line:
+                self.listeners.pop(method, None)
+            try:
+                ok, output = conn.call_finish(result).unpack()
+            except GLib.Error as e:
+                ok, output = False, e.message
+            TRACE.record(["kysettings-helper", method], started, time.monotonic() - t0,
+                         0 if ok else 1, stderr="" if ok else output)
+            if on_done:
+                on_done(ok, output)
+
+        self.bus.call(
+            HELPER_NAME, HELPER_PATH, HELPER_NAME, method, args,
+            GLib.VariantType("(bs)"), Gio.DBusCallFlags.ALLOW_INTERACTIVE_AUTHORIZATION,
+            GLib.MAXINT,  # apt runs and password prompts take as long as they take
+            None, reply,
+        )
+
+
+# =============================================================================
+# INSTALL JOBS
+# =============================================================================
+
+class InstallJobs:
+    """Tracks install processes and folds apt requests into one transaction.
+
+    apt() requests from any feature join the next pending `apt install`;
+    while one apt run is in flight, new requests queue up behind it and go
+    out together, so the dpkg lock and package index are paid for once per
+    batch. Other installs (flatpak, pip, ...) run straight away via run().
+    Every caller hears back through on_done(ok, output) when its process
+    actually exits.
+    """
+
+    def __init__(self, root):
+        self.root = root        # RootHelper, for apt
+        self.active = set()     # AsyncProcess objects still running
+        self.apt_running = False
+        self.apt_packages = []  # next batch, in request order
+        self.apt_waiters = []   # (on_line, on_done) for the next batch
+
+    def run(self, argv, on_line=None, on_done=None):
+        def done(ok, output):
+            self.active.discard(job)
+            if on_done:
+                on_done(ok, output)
+
+        job = AsyncProcess(argv, on_line=on_line, on_done=done)
+        self.active.add(job)
+        return job
+
+    def apt(self, packages, on_line=None, on_done=None):
+        """Install apt packages, batched with any other apt requests."""
+        if not packages:
+            if on_done:
+                GLib.idle_add(on_done, True, "")
+            return
+        self.apt_packages += [p for p in packages if p not in self.apt_packages]
+        self.apt_waiters.append((on_line, on_done))
+        if not self.apt_running:
+            # Let requests made in the same main-loop iteration join in
+            GLib.idle_add(self._start_apt)
+
+    def _start_apt(self):
+        if self.apt_running or not self.apt_packages:
+            return False
+        packages, waiters = self.apt_packages, self.apt_waiters
+        self.apt_packages, self.apt_waiters = [], []
+        self.apt_running = True
+
+        def on_line(line):
+            for cb, _ in waiters:
+                if cb:
+                    cb(line)
+
+        def on_done(ok, output):
+            self.apt_running = False
+            for _, cb in waiters:
+                if cb:
+                    cb(ok, output)
+            self._start_apt()
+
+        self.root.call(
+            "InstallPackages", GLib.Variant("(as)", (packages,)),
+            ["apt", "install", "-y"] + packages, on_line, on_done,
+        )
+        return False
+
+
+# =============================================================================
+# SERVICE SUPERVISOR
+# =============================================================================
+
+SYSTEMD_USER_DIR = pathlib.Path.home() / ".config" / "systemd" / "user"
+FOCUS_AUDIO_UNIT = "kysettings-focus-audio.service"
+SPEECH_LOCK_UNIT = "kysettings-speech-lock@{}.service"
+TIMER_UNIT_PREFIX = "kysettings-timer-"
+
+# Long-lived helpers, run as systemd user units. Restart backoff grows from
+# 2s to 60s on systemd >= 254 (older versions ignore RestartSteps and keep 2s).
+HELPER_UNITS = {
+    FOCUS_AUDIO_UNIT: {
+        "description": "Ky Settings focus audio",
+        "exec": "%h/.local/bin/focus-audio",
+        "wanted_by": "graphical-session.target",
+    },
+    SPEECH_LOCK_UNIT.format(""): {
+        "description": "Ky Settings speech lock (window %i)",
+        "exec": "%h/.local/bin/speech-lock --window %i",
+        "wanted_by": None,
+    },
+}
+
+
+class ServiceSupervisor:
+    """Starts, stops and watches kysettings' helpers as systemd user units.
+
+    Everything goes over D-Bus to the user manager, so nothing forks.
+    ActiveState/SubState are cached from PropertiesChanged signals, which
+    makes state() a dict lookup and lets the UI follow crashes and restarts
+    as they happen.
+    """
+
+    def __init__(self):
+        self.bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        self.states = {}     # unit -> (ActiveState, SubState)
+        self.watchers = {}   # unit -> [callback(unit, active_state, sub_state)]
+        self._manager("Subscribe")
+        self._install_units()
+
+    def _manager(self, method, params=None, reply=None, on_done=None):
+        """Call org.freedesktop.systemd1.Manager; async when on_done is given."""
+        args = ("org.freedesktop.systemd1", "/org/freedesktop/systemd1",
+                "org.freedesktop.systemd1.Manager", method, params,
+                GLib.VariantType(reply) if reply else None,
+                Gio.DBusCallFlags.NONE, -1, None)
+        if on_done is None:
+            return self.bus.call_sync(*args)
+        self.bus.call(*args, self._on_call_done, (method, on_done))
+
+    def _on_call_done(self, bus, result, data):
+        method, on_done = data
+        try:
+            bus.call_finish(result)
+            on_done(True, "")
+        except GLib.Error as e:
+            print(f"systemd {method} failed: {e.message}")
+            on_done(False, e.message)
+
+    def _install_units(self):
+        """Write unit files that are missing or stale, then daemon-reload once."""
+        changed = False
+        SYSTEMD_USER_DIR.mkdir(parents=True, exist_ok=True)
+        for unit, spec in HELPER_UNITS.items():
+            text = (
+                "# Managed by kysettings — changes are overwritten\n"
+                "[Unit]\n"
+                f"Description={spec['description']}\n"
+                "PartOf=graphical-session.target\n"
+                "After=graphical-session.target\n"
+                "StartLimitIntervalSec=300\n"
+                "StartLimitBurst=20\n"
+                "\n[Service]\n"
+                f"ExecStart={spec['exec']}\n"
+                "Environment=PYTHONUNBUFFERED=1\n"
+                "ExecReload=/bin/kill -HUP $MAINPID\n"
+                "Restart=on-failure\n"
+                "RestartSec=2\n"
+                "RestartSteps=5\n"
+                "RestartMaxDelaySec=60\n"
+            )
+            if spec["wanted_by"]:
+                text += f"\n[Install]\nWantedBy={spec['wanted_by']}\n"
+            path = SYSTEMD_USER_DIR / unit
+            if not path.exists() or path.read_text() != text:
+                path.write_text(text)
+                changed = True
+        if changed:
+            self._manager("Reload")
+
+    # ── state ────────────────────────────────────────────────────────────────
+
+    def watch(self, unit, callback):
+        """Track a unit's state; callback(unit, active, sub) fires on every change."""
+        callbacks = self.watchers.setdefault(unit, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
+        if unit in self.states:
+            callback(unit, *self.states[unit])
+            return
+        path = self._manager("LoadUnit", GLib.Variant("(s)", (unit,)), "(o)").unpack()[0]
+        self.bus.signal_subscribe(
+            "org.freedesktop.systemd1", "org.freedesktop.DBus.Properties",
+            "PropertiesChanged", path, "org.freedesktop.systemd1.Unit",
+            Gio.DBusSignalFlags.NONE, self._on_properties_changed, unit,
+        )
+        props = self.bus.call_sync(
+            "org.freedesktop.systemd1", path, "org.freedesktop.DBus.Properties", "GetAll",
+            GLib.Variant("(s)", ("org.freedesktop.systemd1.Unit",)),
+            GLib.VariantType("(a{sv})"), Gio.DBusCallFlags.NONE, -1, None,
+        ).unpack()[0]
+        self._set_state(unit, props.get("ActiveState", "inactive"), props.get("SubState", "dead"))
+
+    def _on_properties_changed(self, bus, sender, path, iface, signal, params, unit):
+        _, changed, _ = params.unpack()
+        if "ActiveState" in changed or "SubState" in changed:
+            active, sub = self.states.get(unit, ("inactive", "dead"))
+            self._set_state(unit, changed.get("ActiveState", active), changed.get("SubState", sub))
+
+    def _set_state(self, unit, active, sub):
+        if self.states.get(unit) == (active, sub):
+            return
+        self.states[unit] = (active, sub)
+        for callback in self.watchers.get(unit, []):
+            callback(unit, active, sub)
+
+    def is_active(self, unit):
+        return self.states.get(unit, ("inactive",))[0] in ("active", "activating", "reloading")
+
+    def pending_timers(self):
+        """Names of kysettings' transient timers that haven't fired yet."""
+        units = self._manager(
+            "ListUnitsByPatterns",
+            GLib.Variant("(asas)", (["active"], [f"{TIMER_UNIT_PREFIX}*.timer"])),
+            "(a(ssssssouso))",
+        ).unpack()[0]
+        return {u[0] for u in units}
+
+    def active_instances(self, template):
+        """Names of running instances of a template unit, e.g. speech-lock@*."""
+        units = self._manager(
+            "ListUnitsByPatterns",
+            GLib.Variant("(asas)", (["active", "activating"], [template.replace("@.", "@*.")])),
+            "(a(ssssssouso))",
+        ).unpack()[0]
+        return [u[0] for u in units]
+
+    # ── control ──────────────────────────────────────────────────────────────
+
+    def start(self, unit, enable=False, on_done=None):
+        """Start a unit; enable=True also starts it with every session."""
+        on_done = on_done or (lambda ok, msg: None)
+
+        def start(ok, msg):
+            self._manager("StartUnit", GLib.Variant("(ss)", (unit, "replace")), "(o)", on_done)
+
+        if enable:
+            self._manager("EnableUnitFiles", GLib.Variant("(asbb)", ([unit], False, True)),
+                          "(ba(sss))", start)
+        else:
+            start(True, "")
+
+    def stop(self, unit, disable=False, on_done=None):
+        on_done = on_done or (lambda ok, msg: None)
+        self._manager("StopUnit", GLib.Variant("(ss)", (unit, "replace")), "(o)", on_done)
+        if disable:
+            self._manager("DisableUnitFiles", GLib.Variant("(asb)", ([unit], False)),
+                          "(a(sss))", lambda ok, msg: None)
+
+    def reload(self, unit):
+        if self.is_active(unit):
+            self._manager("ReloadUnit", GLib.Variant("(ss)", (unit, "replace")), "(o)",
+                          lambda ok, msg: None)
+
+    def start_timer(self, unit, description, calendar, argv, on_done=None):
+        """Run argv at an OnCalendar= time via a transient .timer/.service pair.
+
+        Transient units live in the user manager only, so they fire whether
+        or not Ky Settings is open and vanish once a one-shot has run.
+        """
+        service = unit[:-len(".timer")] + ".service"
+        timer_props = [
+            ("Description", GLib.Variant("s", description)),
+            ("TimersCalendar", GLib.Variant("a(ss)", [("OnCalendar", calendar)])),
+            ("AccuracyUSec", GLib.Variant("t", 1)),
+            ("RemainAfterElapse", GLib.Variant("b", False)),
+        ]
+        service_props = [
+            ("Description", GLib.Variant("s", description)),
+            ("ExecStart", GLib.Variant("a(sasb)", [(argv[0], argv, False)])),
+        ]
+        self._manager(
+            "StartTransientUnit",
+            GLib.Variant("(ssa(sv)a(sa(sv)))",
+                         (unit, "replace", timer_props, [(service, service_props)])),
+            "(o)", on_done or (lambda ok, msg: None),
+        )
+
+
+# =============================================================================
+# DISPLAY POWER
+# =============================================================================
+
+class XDpms:
+    """The X DPMS extension over ctypes, on a private display connection.
+
+    Reads are single round-trips instead of parsing `xset q`, which is
+    what lets DisplayPower check state on every launch for free.
+    """
+
+    def __init__(self):
+        self.xlib = ctypes.cdll.LoadLibrary(ctypes.util.find_library("X11") or "libX11.so.6")
+        self.xext = ctypes.cdll.LoadLibrary(ctypes.util.find_library("Xext") or "libXext.so.6")
+        self.xlib.XOpenDisplay.restype = ctypes.c_void_p
+        self.xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        self.xlib.XFlush.argtypes = [ctypes.c_void_p]
+        dpy = ctypes.c_void_p
+        int_p = ctypes.POINTER(ctypes.c_int)
+        card16_p = ctypes.POINTER(ctypes.c_ushort)
+        self.xext.DPMSQueryExtension.argtypes = [dpy, int_p, int_p]
+        self.xext.DPMSCapable.argtypes = [dpy]
+        self.xext.DPMSGetTimeouts.argtypes = [dpy, card16_p, card16_p, card16_p]
+        self.xext.DPMSInfo.argtypes = [dpy, card16_p, ctypes.POINTER(ctypes.c_ubyte)]
+        self.xext.DPMSSetTimeouts.argtypes = [dpy, ctypes.c_ushort, ctypes.c_ushort, ctypes.c_ushort]
+        self.xext.DPMSEnable.argtypes = [dpy]
+        self.xext.DPMSDisable.argtypes = [dpy]
+        self.dpy = self.xlib.XOpenDisplay(None)
+        if not self.dpy:
+            raise OSError("no X display")
+        event_base, error_base = ctypes.c_int(), ctypes.c_int()
+        if not (self.xext.DPMSQueryExtension(self.dpy, ctypes.byref(event_base),
+                                             ctypes.byref(error_base))
+                and self.xext.DPMSCapable(self.dpy)):
+            raise OSError("X server has no DPMS")
+
+    def get(self):
+        """(enabled, standby, suspend, off) with timeouts in seconds."""
+        standby, suspend, off = ctypes.c_ushort(), ctypes.c_ushort(), ctypes.c_ushort()
+        self.xext.DPMSGetTimeouts(self.dpy, ctypes.byref(standby), ctypes.byref(suspend),
+                                  ctypes.byref(off))
+        level, enabled = ctypes.c_ushort(), ctypes.c_ubyte()
+        self.xext.DPMSInfo(self.dpy, ctypes.byref(level), ctypes.byref(enabled))
+        return bool(enabled.value), standby.value, suspend.value, off.value
+
+    def set(self, enabled, standby, suspend, off):
+        """Write only the parts that differ; returns True if anything changed."""
+        cur_enabled, *cur_timeouts = self.get()
+        changed = False
+        if cur_timeouts != [standby, suspend, off]:
+            self.xext.DPMSSetTimeouts(self.dpy, standby, suspend, off)
+            changed = True
+        if cur_enabled != enabled:
+            (self.xext.DPMSEnable if enabled else self.xext.DPMSDisable)(self.dpy)
+            changed = True
+        if changed:
+            self.xlib.XFlush(self.dpy)
+        return changed
+
+
+class DisplayPower:
+    """Keeps "turn the monitor off after N seconds" applied, idempotently.
+
+    reconcile() compares GSettings and DPMS state in-process and writes only
+    what differs, so it's safe to call on every launch, resume and unlock —
+    gnome-settings-daemon resets X DPMS timeouts on those. On X11 the monitor
+    is powered off by DPMS; on Wayland there is no client DPMS, so Mutter
+    powers it off when GNOME's idle-delay blank kicks in and only the
+    settings need to match (DisplayConfig's PowerSaveMode tells us whether
+    the monitors support it at all).
+    """
+
+    def __init__(self):
+        self.seconds = None
+        self.session = Gio.Settings.new("org.gnome.desktop.session")
+        self.screensaver = Gio.Settings.new("org.gnome.desktop.screensaver")
+        self.power = Gio.Settings.new("org.gnome.settings-daemon.plugins.power")
+        self.dpms = None
+        self.supported = None  # Wayland: PowerSaveMode support, checked once
+        if os.environ.get("XDG_SESSION_TYPE") != "wayland":
+            try:
+                self.dpms = XDpms()
+            except OSError as e:
+                print(f"DPMS unavailable: {e}")
+        self._subscribe()
+
+    def _subscribe(self):
+        # Re-check after resume (logind) and after the lock screen goes away
+        for bus_type, sender, iface, member, path in (
+            (Gio.BusType.SYSTEM, "org.freedesktop.login1", "org.freedesktop.login1.Manager",
+             "PrepareForSleep", "/org/freedesktop/login1"),
+            (Gio.BusType.SESSION, "org.gnome.ScreenSaver", "org.gnome.ScreenSaver",
+             "ActiveChanged", "/org/gnome/ScreenSaver"),
+        ):
+            try:
+                bus = Gio.bus_get_sync(bus_type, None)
+            except GLib.Error:
+                continue
+            bus.signal_subscribe(sender, iface, member, path, None, Gio.DBusSignalFlags.NONE,
+                                 self._on_wake)
+
+    def _on_wake(self, conn, sender, path, iface, signal, params):
+        (active,) = params.unpack()
+        if not active and self.seconds is not None:
+            self.reconcile(self.seconds)
+
+    @staticmethod
+    def _ensure(settings, key, type_string, value):
+        """Compare-then-set, so matching keys never hit dconf."""
+        variant = GLib.Variant(type_string, value)
+        if settings.get_value(key).equal(variant):
+            return False
+        settings.set_value(key, variant)
+        return True
+
+    def power_save_supported(self):
+        """Wayland: whether Mutter can power the monitors down (PowerSaveMode != -1)."""
+        try:
+            bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+            mode = bus.call_sync(
+                "org.gnome.Mutter.DisplayConfig", "/org/gnome/Mutter/DisplayConfig",
+                "org.freedesktop.DBus.Properties", "Get",
+                GLib.Variant("(ss)", ("org.gnome.Mutter.DisplayConfig", "PowerSaveMode")),
+                GLib.VariantType("(v)"), Gio.DBusCallFlags.NONE, -1, None,
+            ).unpack()[0]
+        except GLib.Error:
+            return False
+        return mode != -1
+
+    def reconcile(self, seconds):
+        """Bring everything in line with a monitor-off timeout (0 = never)."""
+        self.seconds = seconds
+        self._ensure(self.session, "idle-delay", "u", seconds)
+        # Power the monitor off rather than having the screensaver just blank it
+        self._ensure(self.screensaver, "idle-activation-enabled", "b", False)
+        self._ensure(self.power, "idle-dim", "b", False)
+        if self.dpms:
+            # No standby, no suspend, off after <seconds>; "never" disables DPMS
+            self.dpms.set(seconds > 0, 0, 0, seconds)
+        elif self.supported is None:
+            self.supported = self.power_save_supported()
+            if not self.supported:
+                print("Monitor power saving is not available in this session")
+
+
+# =============================================================================
+# TIMER ENGINE
+# =============================================================================
+# All times are GLib.get_monotonic_time() microseconds, which never jump with
+# NTP or timezone changes. Timers store absolute deadlines and the display is
+# derived from them on each redraw, so a stalled main loop can delay a redraw
+# but never shifts the timer itself. `now` arguments exist for that reason too:
+# the engine is plain arithmetic and doesn't care who calls it or how late.
+#
+# Nothing polls: each expiry is one GLib timeout at its deadline, and labels
+# redraw from the frame clock only while they're on screen.
+
+USEC = 1_000_000
+
+TIMERS_FILE = pathlib.Path.home() / ".config" / "kysettings" / "timers.json"
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+ALARM_SOUND = "/usr/share/sounds/freedesktop/stereo/alarm-clock-elapsed.oga"
+ALARM_REPEATS = {
+    "Once": (),
+    "Every day": (0, 1, 2, 3, 4, 5, 6),
+    "Weekdays": (0, 1, 2, 3, 4),
+    "Weekends": (5, 6),
+}
+
+
+def format_duration(us, tenths=False):
+    total = max(0, us) // (USEC // 10)
+    secs, tenth = divmod(total, 10)
+    h, rem = divmod(secs, 3600)
+    m, s = divmod(rem, 60)
+    text = f"{h:02d}:{m:02d}:{s:02d}"
+    return f"{text}.{tenth}" if tenths else text
+
+
+def alarm_command(title):
+    """What goes off when a timer expires — run by systemd, or by us as a fallback."""
+    return ["/bin/sh", "-c", 'notify-send -u critical "$1" "Time\'s up!" & pw-play "$2"; wait',
+            "kysettings-alarm", title, ALARM_SOUND]
+
+
+def timeout_at(deadline, callback):
+    """One-shot GLib timeout firing at a monotonic deadline (µs)."""
+    delay_ms = -(-(deadline - GLib.get_monotonic_time()) // 1000)  # round up
+    return GLib.timeout_add(max(0, delay_ms), callback)
+
+
+class LiveLabel:
+    """Redraws a label from render() every frame while active and mapped.
+
+    Tick callbacks stop with the frame clock, so a label on a hidden page
+    or in a hidden window costs nothing until it's shown again.
+    """
+
+    def __init__(self, label, render):
+        self.label = label
+        self.render = render
+        self.active = False
+        self.tick_id = None
+        label.connect("map", lambda w: self._sync())
+        label.connect("unmap", lambda w: self._sync())
+
+    def set_active(self, active):
+        self.active = active
+        self._sync()
+        self._draw()
+
+    def _sync(self):
+        want = self.active and self.label.get_mapped()
+        if want and self.tick_id is None:
+            self.tick_id = self.label.add_tick_callback(self._tick)
+            self._draw()
+        elif not want and self.tick_id is not None:
+            self.label.remove_tick_callback(self.tick_id)
+            self.tick_id = None
+
+    def _tick(self, widget, frame_clock):
+        self._draw()
+        return GLib.SOURCE_CONTINUE
+
+    def _draw(self):
+        text = self.render()
+        if text != self.label.get_label():
+            self.label.set_label(text)
+
+
+class LapTimes:
+    """Stopwatch laps as µs offsets from the start, in one array.
+
+    Best, mean and standard deviation of the lap durations are updated per
+    lap (Welford), so recording lap 50,000 costs the same as lap 1.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.offsets = array.array("q")
+        self.best = None
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def add(self, offset):
+        lap = offset - (self.offsets[-1] if self.offsets else 0)
+        self.offsets.append(offset)
+        self.best = lap if self.best is None else min(self.best, lap)
+        delta = lap - self.mean
+        self.mean += delta / len(self.offsets)
+        self._m2 += delta * (lap - self.mean)
+
+    def lap(self, i):
+        return self.offsets[i] - (self.offsets[i - 1] if i else 0)
+
+    def stddev(self):
+        n = len(self.offsets)
+        return (self._m2 / (n - 1)) ** 0.5 if n > 1 else 0.0
+
+    def to_csv(self):
+        rows = ["lap,lap_us,total_us"]
+        rows += [f"{i + 1},{self.lap(i)},{offset}" for i, offset in enumerate(self.offsets)]
+        return "\n".join(rows) + "\n"
+
+
+class LapModel(GObject.Object, Gio.ListModel):
+    """Gio.ListModel over LapTimes for Gtk.ListView, newest lap first.
+
+    Row objects are only made when the view asks for them, i.e. for the
+    handful of rows on screen, so the laps themselves stay in the array.
+    """
+
+    def __init__(self, laps):
+        super().__init__()
+        self.laps = laps
+
+    def do_get_item_type(self):
+        return Gtk.StringObject.__gtype__
+
+    def do_get_n_items(self):
+        return len(self.laps)
+
+    def do_get_item(self, position):
+        i = len(self.laps) - 1 - position
+        if i < 0:
+            return None
+        lap = format_duration(self.laps.lap(i), tenths=True)
+        total = format_duration(self.laps.offsets[i], tenths=True)
+        return Gtk.StringObject.new(f"{i + 1}\t{lap}\t{total}")
+
+
+class Stopwatch:
+    def __init__(self):
+        self.started = None  # monotonic start of the current run
+        self.banked = 0      # µs from earlier runs
+        self.laps = LapTimes()
+
+    @property
+    def running(self):
+        return self.started is not None
+
+    def start(self, now=None):
+        if self.started is None:
+            self.started = GLib.get_monotonic_time() if now is None else now
+
+    def stop(self, now=None):
+        if self.started is not None:
+            self.banked = self.elapsed(now)
+            self.started = None
+
+    def reset(self):
+        self.started = None
+        self.banked = 0
+        self.laps.clear()
+
+    def lap(self, now=None):
+        self.laps.add(self.elapsed(now))
+
+    def elapsed(self, now=None):
+        if self.started is None:
+            return self.banked
+        now = GLib.get_monotonic_time() if now is None else now
+        return self.banked + now - self.started
+
+
+class Countdown:
+    def __init__(self, name="", duration=0):
+        self.name = name
+        self.duration = duration  # µs, what reset() goes back to
+        self.deadline = None      # monotonic expiry while running
+        self.ends_at = None       # the same instant as wall-clock µs, for resync/saving
+        self.left = duration      # µs remaining while paused
+        self.uid = uuid.uuid4().hex[:8]
+        self.unit = None          # transient systemd timer that will ring it
+
+    @property
+    def running(self):
+        return self.deadline is not None
+
+    @property
+    def title(self):
+        return self.name or "Countdown"
+
+    def calendar(self):
+        when = datetime.fromtimestamp(self.ends_at / USEC)
+        return when.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    def start(self, now=None):
+        if self.deadline is not None or not self.left:
+            return
+        now = GLib.get_monotonic_time() if now is None else now
+        self.deadline = now + self.left
+        self.ends_at = GLib.get_real_time() + self.left
+
+    def stop(self, now=None):
+        if self.deadline is not None:
+            self.left = self.remaining(now)
+            self.deadline = self.ends_at = None
+
+    def reset(self):
+        self.deadline = self.ends_at = None
+        self.left = self.duration
+
+    def resync(self):
+        """Count suspended time too: re-derive the deadline from the wall clock."""
+        if self.ends_at is not None:
+            self.deadline = GLib.get_monotonic_time() + self.ends_at - GLib.get_real_time()
+
+    def remaining(self, now=None):
+        if self.deadline is None:
+            return self.left
+        now = GLib.get_monotonic_time() if now is None else now
+        return max(0, self.deadline - now)
+
+
+class Alarm:
+    """A local wall-clock time, optionally repeating on some weekdays.
+
+    Tracked as a monotonic deadline. The monotonic clock stops while the
+    machine is suspended, so after a resume (or a wall-clock step) resync()
+    re-derives the deadline from the wall clock — the alarm rings at the
+    time on the clock, not N hours of awake time after it was set.
+    """
+
+    def __init__(self, name="", hour=7, minute=0, days=()):
+        self.name = name
+        self.hour = hour
+        self.minute = minute
+        self.days = tuple(days)  # weekdays (0 = Monday) to repeat on; empty = once
+        self.when = None         # aware local datetime
+        self.deadline = None     # monotonic
+        self.uid = uuid.uuid4().hex[:8]
+        self.unit = None         # transient systemd timer that will ring it
+        self.schedule()
+
+    @property
+    def title(self):
+        return self.name or "Alarm"
+
+    def calendar(self):
+        if not self.days:
+            return self.when.strftime("%Y-%m-%d %H:%M:%S")
+        days = "" if len(self.days) == 7 else ",".join(WEEKDAYS[d] for d in self.days) + " "
+        return f"{days}*-*-* {self.hour:02d}:{self.minute:02d}:00"
+
+    def schedule(self):
+        """Point at the next matching time that's still in the future."""
+        now = datetime.now()
+        when = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        while when <= now or (self.days and when.weekday() not in self.days):
+            when += timedelta(days=1)
+        self.when = when.astimezone()  # resolve the UTC offset on that day (DST)
+        self.resync()
+
+    def resync(self):
+        wall_left = int(self.when.timestamp() * USEC) - GLib.get_real_time()
+        self.deadline = GLib.get_monotonic_time() + wall_left
+
+    def due(self, now=None):
+        now = GLib.get_monotonic_time() if now is None else now
+        return now >= self.deadline
+
+    def describe(self):
+        repeat = next((label for label, days in ALARM_REPEATS.items() if days == self.days),
+                      " ".join(WEEKDAYS[d] for d in self.days))
+        return f"{self.when.strftime('%a %H:%M')} · {repeat}"
+
+
+class TimerScheduler:
+    """Any number of countdowns and alarms behind a single GLib timeout.
+
+    Deadlines sit in a min-heap and only the earliest has a timeout armed,
+    so wakeups don't grow with the number of timers. Entries whose timer
+    was paused, rescheduled or removed since they were pushed are dropped
+    when they surface (lazy deletion) instead of being searched for.
+
+    Once attach() is given the ServiceSupervisor, every pending timer is
+    mirrored as a transient systemd user timer that runs alarm_command(),
+    so alarms ring with the app closed; the in-app heap then only drives
+    the UI.
+    """
+
+    def __init__(self, on_fire, path=TIMERS_FILE):
+        self.on_fire = on_fire  # on_fire(timer) after a countdown or alarm goes off
+        self.path = path
+        self.units = None       # ServiceSupervisor once attached
+        self.timers = []        # display order
+        self.heap = []          # (deadline, seq, timer)
+        self.seq = itertools.count()
+        self.source_id = None
+        self.armed_for = None
+        self.on_change = None   # on_change() after every saved change
+
+    def add(self, timer):
+        self.timers.append(timer)
+        self.update(timer)
+
+    def remove(self, timer):
+        self.timers.remove(timer)
+        self._sync_unit(timer, wanted=False)
+        self._arm()
+        self.save()
+
+    def update(self, timer):
+        """Call after start, stop or reschedule so the new deadline is queued."""
+        if timer.deadline is not None:
+            heapq.heappush(self.heap, (timer.deadline, next(self.seq), timer))
+        self._sync_unit(timer, wanted=timer.deadline is not None)
+        self._arm()
+        self.save()
+
+    def attach(self, units):
+        """Hand ringing over to systemd, reconciling with the timers it already has."""
+        self.units = units
+        pending = units.pending_timers()
+        for timer in self.timers:
+            if timer.unit not in pending:
+                timer.unit = None
+                self._sync_unit(timer, wanted=timer.deadline is not None)
+        known = {timer.unit for timer in self.timers}
+        for unit in pending - known:
+            units.stop(unit)
+        self.save()
+
+    def _sync_unit(self, timer, wanted):
+        if self.units is None:
+            return
+        if timer.unit:
+            self.units.stop(timer.unit)
+            timer.unit = None
+        if wanted:
+            # A fresh name each time, so a new unit never collides with one still stopping
+            timer.unit = f"{TIMER_UNIT_PREFIX}{timer.uid}-{GLib.get_real_time():x}.timer"
+            self.units.start_timer(timer.unit, f"Ky Settings: {timer.title}", timer.calendar(),
+                                   alarm_command(timer.title))
+
+    def resync(self):
+        for timer in self.timers:
+            if timer.deadline is not None:
+                timer.resync()
+                heapq.heappush(self.heap, (timer.deadline, next(self.seq), timer))
+        self._arm()
+
+    def _live(self, entry):
+        deadline, _, timer = entry
+        return timer.deadline == deadline and timer in self.timers
+
+    def _arm(self):
+        while self.heap and not self._live(self.heap[0]):
+            heapq.heappop(self.heap)
+        deadline = self.heap[0][0] if self.heap else None
+        if deadline == self.armed_for:
+            return
+        if self.source_id:
+            GLib.source_remove(self.source_id)
+            self.source_id = None
+        self.armed_for = deadline
+        if deadline is not None:
+            self.source_id = timeout_at(deadline, self._fire)
+
+    def _fire(self):
+        self.source_id = self.armed_for = None
+        now = GLib.get_monotonic_time()
+        while self.heap and self.heap[0][0] <= now:
+            entry = heapq.heappop(self.heap)
+            if not self._live(entry):
+                continue
+            timer = entry[2]
+            if isinstance(timer, Countdown):
+                timer.reset()
+                timer.unit = None  # one-shot: systemd has already dropped it
+            elif timer.days:
+                timer.schedule()  # the systemd timer repeats on its own
+                heapq.heappush(self.heap, (timer.deadline, next(self.seq), timer))
+            else:
+                self.timers.remove(timer)
+            self.on_fire(timer)
+        self._arm()
+        self.save()
+        return False
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = GLib.get_real_time()
+        for c in saved.get("countdowns", []):
+            timer = Countdown(c.get("name", ""), c.get("duration", 0))
+            timer.left = c.get("left", timer.duration)
+            ends_at = c.get("ends_at")
+            if ends_at and ends_at > now:
+                timer.left = ends_at - now
+                timer.start()
+                timer.ends_at = ends_at  # keep the instant the systemd timer was set for
+            elif ends_at:
+                timer.reset()  # ran out (and rang, if systemd had it) while we were closed
+            timer.uid = c.get("uid", timer.uid)
+            timer.unit = c.get("unit") if timer.running else None
+            self.timers.append(timer)
+        for a in saved.get("alarms", []):
+            timer = Alarm(a.get("name", ""), a.get("hour", 7), a.get("minute", 0),
+                          a.get("days", ()))
+            at = a.get("at")
+            if not timer.days and at and at * USEC <= now:
+                continue  # a one-shot that already went off
+            timer.uid = a.get("uid", timer.uid)
+            timer.unit = a.get("unit")
+            self.timers.append(timer)
+        for timer in self.timers:
+            if timer.deadline is not None:
+                heapq.heappush(self.heap, (timer.deadline, next(self.seq), timer))
+        self._arm()
+
+    def save(self):
+        saved = {"countdowns": [], "alarms": []}
+        for timer in self.timers:
+            if isinstance(timer, Countdown):
+                saved["countdowns"].append({"name": timer.name, "duration": timer.duration,
+                                            "left": timer.left, "ends_at": timer.ends_at,
+                                            "uid": timer.uid, "unit": timer.unit})
+            else:
+                saved["alarms"].append({"name": timer.name, "hour": timer.hour,
+                                        "minute": timer.minute, "days": list(timer.days),
+                                        "at": timer.when.timestamp(),
+                                        "uid": timer.uid, "unit": timer.unit})
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(saved, indent=2))
+            tmp.replace(self.path)
+        except OSError as e:
+            print(f"Could not save timers: {e}")
+        if self.on_change:
+            self.on_change()
+
+
+# =============================================================================
+# DESKTOP STATE
+# =============================================================================
+# Reads and writes shared by the window and the headless CLI below, so both
+# agree on what "Kyle's desktop" or "proxy on" means. Nothing here touches
+# Gtk; the subprocess-backed ones are safe to run on worker threads.
+
+APP_DESKTOP_FILE = "com.ky.settings.desktop"
+HIDE_TOP_BAR_UUID = "hidetopbar@mathieu.bidon.ca"
+REDSOCKS_PID_FILE = "/tmp/redsocks-pdanet.pid"  # written by pdanet-proxy
+
+PDANET_PROXY_HOST = "192.168.49.1"
+PDANET_PROXY_PORT = 8000
+PDANET_IGNORE_HOSTS = "['localhost', '127.0.0.0/8', '::1', '192.168.49.*']"
+# Every key PDANet sets under /system/proxy/, for one `dconf load`
+PDANET_DCONF_KEYFILE = (
+    f"[/]\nmode='manual'\nignore-hosts={PDANET_IGNORE_HOSTS}\n"
+    f"[http]\nhost='{PDANET_PROXY_HOST}'\nport={PDANET_PROXY_PORT}\n"
+    f"[https]\nhost='{PDANET_PROXY_HOST}'\nport={PDANET_PROXY_PORT}\n"
+)
+# The same keys back at their schema defaults; the rest of the tree (socks,
+# ftp, autoconfig, http authentication) is the user's and stays as it is
+PDANET_DCONF_DEFAULTS = (
+    "[/]\nmode='none'\nignore-hosts=['localhost', '127.0.0.0/8', '::1']\n"
+    "[http]\nhost=''\nport=8080\n"
+    "[https]\nhost=''\nport=0\n"
+)
+PDANET_ENV_FILE = os.path.expanduser("~/.proxy_env")
+
+# (schema, key, kyle_value, ubuntu_default)
+DESKTOP_SETTINGS = [
+    # Theme
+    ("org.gnome.desktop.interface", "gtk-theme", "Yaru-sage-dark", "Yaru-dark"),
+    ("org.gnome.desktop.interface", "color-scheme", "prefer-dark", "prefer-dark"),
+    ("org.gnome.desktop.interface", "icon-theme", "Yaru-sage", "Yaru"),
+    ("org.gnome.desktop.interface", "cursor-theme", "Yaru", "Yaru"),
+    # Fonts
+    ("org.gnome.desktop.interface", "font-name", "Ubuntu Sans 11", "Ubuntu Sans 11"),
+    ("org.gnome.desktop.interface", "document-font-name", "Sans 11", "Sans 11"),
+    ("org.gnome.desktop.interface", "monospace-font-name", "Ubuntu Sans Mono 13", "Ubuntu Mono 13"),
+    # Wallpaper
+    ("org.gnome.desktop.background", "picture-uri-dark",
+     "file:///usr/share/backgrounds/Fuji_san_by_amaral.png",
+     "file:///usr/share/backgrounds/ubuntu-wallpaper-d.png"),
+    ("org.gnome.desktop.background", "picture-uri",
+     "file:///usr/share/backgrounds/Fuji_san_by_amaral.png",
+     "file:///usr/share/backgrounds/ubuntu-wallpaper-d.png"),
+    ("org.gnome.desktop.background", "picture-options", "zoom", "zoom"),
+    # Dock
+    ("org.gnome.shell.extensions.dash-to-dock", "dock-position", "BOTTOM", "LEFT"),
+    ("org.gnome.shell.extensions.dash-to-dock", "dash-max-icon-size", 38, 48),
+    ("org.gnome.shell.extensions.dash-to-dock", "autohide", True, False),
+    # Compositor
+    ("org.gnome.mutter", "center-new-windows", False, False),
+]
+
+
+def settings_for(schema_id):
+    """Gio.Settings for schema_id, or None if it isn't installed.
+
+    Gio.Settings.new() aborts the process on a missing schema, which no
+    try/except can catch.
+    """
+    source = Gio.SettingsSchemaSource.get_default()
+    if source and source.lookup(schema_id, True):
+        return Gio.Settings.new(schema_id)
+    return None
+
+
+def is_kyle_desktop():
+    """Check if current desktop matches Kyle's settings (by gtk-theme)."""
+    s = settings_for("org.gnome.desktop.interface")
+    return bool(s) and s.get_string("gtk-theme") == "Yaru-sage-dark"
+
+
+def apply_desktop(use_kyle):
+    """Write Kyle's settings or the Ubuntu defaults. Returns (applied, errors)."""
+    applied = 0
+    errors = []
+    for schema, key, kyle_val, default_val in DESKTOP_SETTINGS:
+        value = kyle_val if use_kyle else default_val
+        s = settings_for(schema)
+        if s is None:
+            errors.append(f"{schema}.{key}: schema not installed")
+            continue
+        try:
+            if isinstance(value, bool):
+                s.set_boolean(key, value)
+            elif isinstance(value, int):
+                s.set_int(key, value)
+            else:
+                s.set_string(key, value)
+            applied += 1
+        except Exception as e:
+            errors.append(f"{schema}.{key}: {e}")
+    return applied, errors
+
+
+def is_pinned():
+    """Check if app is in GNOME favorites."""
+    s = settings_for("org.gnome.shell")
+    return bool(s) and APP_DESKTOP_FILE in s.get_strv("favorite-apps")
+
+
+def set_pinned(pinned):
+    """Add or remove app from GNOME dash favorites."""
+    s = settings_for("org.gnome.shell")
+    if s is None:
+        return False
+    favorites = list(s.get_strv("favorite-apps"))
+    if pinned and APP_DESKTOP_FILE not in favorites:
+        favorites.append(APP_DESKTOP_FILE)
+    elif not pinned and APP_DESKTOP_FILE in favorites:
+        favorites.remove(APP_DESKTOP_FILE)
+    else:
+        return True
+    return s.set_strv("favorite-apps", favorites)
+
+
+def blank_seconds():
+    s = settings_for("org.gnome.desktop.session")
+    return s.get_uint("idle-delay") if s else None
+
+
+def is_hide_top_bar_enabled():
+    """Check if Hide Top Bar extension is installed and active."""
+    try:
+        result = run_command(["gnome-extensions", "info", HIDE_TOP_BAR_UUID])
+        return "State: ACTIVE" in result.stdout or "State: ENABLED" in result.stdout
+    except Exception:
+        return False
+
+
+def is_hide_top_bar_installed():
+    """Check if Hide Top Bar extension is installed."""
+    try:
+        result = run_command(["gnome-extensions", "info", HIDE_TOP_BAR_UUID])
+        return result.returncode == 0
+    except Exception:
+        return False
+
+
+def install_hide_top_bar_via_dbus():
+    """Install Hide Top Bar via GNOME Shell dbus (triggers scan + enable)."""
+    try:
+        run_command(
+            ["gdbus", "call", "--session",
+             "--dest", "org.gnome.Shell.Extensions",
+             "--object-path", "/org/gnome/Shell/Extensions",
+             "--method", "org.gnome.Shell.Extensions.InstallRemoteExtension",
+             HIDE_TOP_BAR_UUID],
+            timeout=15,
+        )
+        return True
+    except Exception as e:
+        print(f"Failed to install Hide Top Bar via dbus: {e}")
+        return False
+
+
+def set_hide_top_bar(enable):
+    """Install if needed, then enable or disable.
+
+    Returns a message describing the failure, or None.
+    """
+    if enable and not is_hide_top_bar_installed():
+        if not install_hide_top_bar_via_dbus():
+            return "Install failed — check internet connection"
+        # dbus install auto-enables, so we're done
+        return None
+
+    action = "enable" if enable else "disable"
+    try:
+        run_command(["gnome-extensions", action, HIDE_TOP_BAR_UUID])
+    except Exception as e:
+        print(f"Failed to {action} Hide Top Bar: {e}")
+        return f"Could not {action} Hide Top Bar"
+    return None
+
+
+def is_bluetooth_powered():
+    """Check if Bluetooth adapter is powered on."""
+    try:
+        result = run_command(["bluetoothctl", "show"])
+        return "Powered: yes" in result.stdout
+    except Exception:
+        return False
+
+
+def is_redsocks_proxy_running():
+    """Check if redsocks transparent proxy is active (no root needed).
+
+    Same test as `pdanet-proxy status`, done in-process: the pidfile
+    exists and names a live process.
+    """
+    try:
+        with open(REDSOCKS_PID_FILE) as f:
+            pid = f.read().strip()
+        return bool(pid) and os.path.isdir(f"/proc/{pid}")
+    except OSError:
+        return False
+
+
+def is_pdanet_proxy_active():
+    """Check if GNOME system proxy is set to PDANet+."""
+    proxy = settings_for("org.gnome.system.proxy")
+    if proxy is None or proxy.get_string("mode") != "manual":
+        return False
+    return proxy.get_child("http").get_string("host") == PDANET_PROXY_HOST
+
+
+def proxy_mode():
+    """"pdanet" when the system proxy points at PDANet+, else GNOME's mode."""
+    proxy = settings_for("org.gnome.system.proxy")
+    if proxy is None:
+        return "none"
+    return "pdanet" if is_pdanet_proxy_active() else proxy.get_string("mode")
+
+
+def pdanet_apt_conf():
+    proxy_url = f"http://{PDANET_PROXY_HOST}:{PDANET_PROXY_PORT}"
+    return f'Acquire::http::Proxy "{proxy_url}";\nAcquire::https::Proxy "{proxy_url}";\n'
+
+
+def pdanet_proxy_enable():
+    """Set GNOME system proxy + env vars for CLI tools.
+
+    apt's proxy needs root: the caller sends pdanet_apt_conf() through the
+    RootHelper afterwards.
+    """
+    host = PDANET_PROXY_HOST
+    port = str(PDANET_PROXY_PORT)
+    proxy_url = f"http://{host}:{port}"
+
+    # 1. GNOME system proxy (browsers, GUI apps), as one dconf change so
+    # nothing ever sees mode=manual without the host
+    run_command(["dconf", "load", "/system/proxy/"], input=PDANET_DCONF_KEYFILE)
+
+    # 2. Env var file sourced by shells (curl, wget, git, apt, pip, etc.)
+    no_proxy = "localhost,127.0.0.0/8,::1,192.168.49.*"
+    env_content = (
+        f'export http_proxy="{proxy_url}"\n'
+        f'export https_proxy="{proxy_url}"\n'
+        f'export HTTP_PROXY="{proxy_url}"\n'
+        f'export HTTPS_PROXY="{proxy_url}"\n'
+        f'export no_proxy="{no_proxy}"\n'
+        f'export NO_PROXY="{no_proxy}"\n'
+    )
+    try:
+        with open(PDANET_ENV_FILE, "w") as f:
+            f.write(env_content)
+    except Exception:
+        pass
+
+    # Ensure bashrc sources the env file
+    _ensure_bashrc_hook()
+
+
+def pdanet_proxy_disable():
+    """Reset all proxy settings to defaults (apt's is the caller's, as above)."""
+    # 1. GNOME system proxy: the keys we set, back to defaults in one change
+    run_command(["dconf", "load", "/system/proxy/"], input=PDANET_DCONF_DEFAULTS)
+
+    # 2. Remove env var file
+    try:
+        os.remove(PDANET_ENV_FILE)
+    except FileNotFoundError:
+        pass
+
+
+def pdanet_apt_proxy(root, enable, on_done=None):
+    """apt needs its own proxy config, written by the root helper."""
+    if enable:
+        root.call(
+            "SetAptProxy", GLib.Variant("(sq)", (PDANET_PROXY_HOST, PDANET_PROXY_PORT)),
+            ["bash", "-c", f"echo '{pdanet_apt_conf()}' > {APT_PROXY_CONF}"],
+            on_done=on_done,
+        )
+    else:
+        root.call("ClearAptProxy", None, ["rm", "-f", APT_PROXY_CONF], on_done=on_done)
+
+
+def _ensure_bashrc_hook():
+    """Add proxy_env source line to ~/.bashrc if not already present."""
+    bashrc = os.path.expanduser("~/.bashrc")
+    hook = '[ -f ~/.proxy_env ] && . ~/.proxy_env'
+    try:
+        existing = ""
+        if os.path.exists(bashrc):
+            with open(bashrc, "r") as f:
+                existing = f.read()
+        if hook not in existing:
+            with open(bashrc, "a") as f:
+                f.write(f"\n# PDANet proxy env vars (managed by kysettings)\n{hook}\n")
+    except Exception:
+        pass
+
+
+# =============================================================================
+# STATE API
+# =============================================================================
+
+APP_ID = "com.ky.settings"
+STATE_PATH = "/com/ky/settings/State"
+STATE_INTERFACE = "com.ky.settings.State"
+
+# name -> D-Bus type
+STATE_PROPERTIES = {
+    "ProxyMode": "s",         # "pdanet", or GNOME's own mode: "none", "manual", "auto"
+    "TransparentProxy": "b",  # redsocks running
+    "AutoMute": "b",          # focus-audio unit active
+    "Bluetooth": "b",         # adapter powered
+    "HideTopBar": "b",
+    "Desktop": "s",           # "kyle" or "ubuntu"
+    "BlankSeconds": "u",
+    "Pinned": "b",
+    "Timers": "a(ssx)",       # (kind, name, rings at in unix seconds, 0 = paused)
+}
+
+STATE_XML = (
+    f'<node><interface name="{STATE_INTERFACE}">'
+    + "".join(f'<property name="{name}" type="{sig}" access="read">'
+              '<annotation name="org.freedesktop.DBus.Property.EmitsChangedSignal" value="true"/>'
+              '</property>' for name, sig in STATE_PROPERTIES.items())
+    + "</interface></node>"
+)
+
+
+class StateService:
+    """com.ky.settings.State — one typed view of kysettings' state.
+
+    The resident app exports this on the session bus, so the CLI, the
+    pdanet script and the window all read the same answers with one round
+    trip instead of each re-deriving them. Values are kept current from
+    change notifications only — GSettings signals, a file monitor on the
+    redsocks pidfile, BlueZ and GNOME Shell signals, the focus-audio unit
+    and the timer scheduler — and everything that changes within one
+    main-loop iteration goes out in a single PropertiesChanged. listen()
+    gives in-process code the same updates.
+    """
+
+    def __init__(self, connection, workers):
+        self.connection = connection
+        self.workers = workers
+        self.values = {
+            "ProxyMode": proxy_mode(),
+            "TransparentProxy": is_redsocks_proxy_running(),
+            "AutoMute": False,
+            "Bluetooth": False,
+            "HideTopBar": False,
+            "Desktop": "kyle" if is_kyle_desktop() else "ubuntu",
+            "BlankSeconds": blank_seconds() or 0,
+            "Pinned": is_pinned(),
+            "Timers": [],
+        }
+        self.changed = {}
+        self.flush_id = 0
+        self.listeners = []
+        self.sources = []  # Settings and monitors, kept alive for their signals
+        node = Gio.DBusNodeInfo.new_for_xml(STATE_XML)
+        connection.register_object(STATE_PATH, node.interfaces[0], None, self._get_property, None)
+        self._watch_settings()
+        self._watch_pidfile()
+        self._watch_signals()
+        self.refresh()
+
+    def listen(self, callback):
+        """callback(name, value) after every change."""
+        self.listeners.append(callback)
+
+    def set(self, name, value):
+        if self.values.get(name) == value:
+            return
+        self.values[name] = value
+        self.changed[name] = value
+        for callback in self.listeners:
+            callback(name, value)
+        if not self.flush_id:
+            self.flush_id = GLib.idle_add(self._flush)
+
+    def _flush(self):
+        self.flush_id = 0
+        changed = {name: GLib.Variant(STATE_PROPERTIES[name], value)
+                   for name, value in self.changed.items()}
+        self.changed = {}
+        self.connection.emit_signal(
+            None, STATE_PATH, "org.freedesktop.DBus.Properties", "PropertiesChanged",
+            GLib.Variant("(sa{sv}as)", (STATE_INTERFACE, changed, [])),
+        )
+        return False
+
+    def _get_property(self, conn, sender, path, iface, name):
+        return GLib.Variant(STATE_PROPERTIES[name], self.values[name])
+
+    def refresh(self):
+        """Re-probe what only a subprocess can tell us, off the main loop."""
+        self.workers.submit(is_bluetooth_powered, resource="bluetooth",
+                            on_done=lambda on, error: self.set("Bluetooth", bool(on)))
+        self.workers.submit(is_hide_top_bar_enabled, resource="hide-top-bar",
+                            on_done=lambda on, error: self.set("HideTopBar", bool(on)))
+
+    # ── sources ──────────────────────────────────────────────────────────────
+
+    def _watch_settings(self):
+        for schema, key, name, read in (
+            ("org.gnome.system.proxy", "mode", "ProxyMode", proxy_mode),
+            ("org.gnome.system.proxy.http", "host", "ProxyMode", proxy_mode),
+            ("org.gnome.desktop.interface", "gtk-theme", "Desktop",
+             lambda: "kyle" if is_kyle_desktop() else "ubuntu"),
+            ("org.gnome.desktop.session", "idle-delay", "BlankSeconds", lambda: blank_seconds() or 0),
+            ("org.gnome.shell", "favorite-apps", "Pinned", is_pinned),
+        ):
+            settings = settings_for(schema)
+            if settings is None:
+                continue
+            settings.connect(f"changed::{key}",
+                             lambda s, k, name=name, read=read: self.set(name, read()))
+            settings.get_value(key)  # GSettings only reports keys it has read
+            self.sources.append(settings)
+
+    def _watch_pidfile(self):
+        monitor = Gio.File.new_for_path(REDSOCKS_PID_FILE).monitor_file(Gio.FileMonitorFlags.NONE, None)
+        monitor.connect("changed", lambda *args: self.set("TransparentProxy", is_redsocks_proxy_running()))
+        self.sources.append(monitor)
+
+    def _watch_signals(self):
+        try:
+            system = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+        except GLib.Error:
+            system = None
+        if system:
+            system.signal_subscribe(
+                "org.bluez", "org.freedesktop.DBus.Properties", "PropertiesChanged", None,
+                "org.bluez.Adapter1", Gio.DBusSignalFlags.NONE, self._on_adapter_changed,
+            )
+        self.connection.signal_subscribe(
+            "org.gnome.Shell", "org.gnome.Shell.Extensions", "ExtensionStateChanged",
+            "/org/gnome/Shell", None, Gio.DBusSignalFlags.NONE, self._on_extension_changed,
+        )
+
+    def _on_adapter_changed(self, conn, sender, path, iface, signal, params):
+        _, changed, _ = params.unpack()
+        if "Powered" in changed:
+            self.set("Bluetooth", bool(changed["Powered"]))
+
+    def _on_extension_changed(self, conn, sender, path, iface, signal, params):
+        uuid_, state = params.unpack()
+        if uuid_ == HIDE_TOP_BAR_UUID:
+            # "enabled" on GNOME 45+; before that, state 1 is ENABLED
+            self.set("HideTopBar", bool(state.get("enabled", state.get("state") == 1)))
+
+    def follow_unit(self, supervisor):
+        supervisor.watch(FOCUS_AUDIO_UNIT, lambda unit, active, sub: self.set(
+            "AutoMute", supervisor.is_active(unit)))
+        self.set("AutoMute", supervisor.is_active(FOCUS_AUDIO_UNIT))
+
+    def follow_timers(self, scheduler):
+        def publish():
+            self.set("Timers", [timer_state(timer) for timer in scheduler.timers])
+        scheduler.on_change = publish
+        publish()
+
+
+def timer_state(timer):
+    """(kind, name, rings at) for the Timers property."""
+    if isinstance(timer, Countdown):
+        return ("countdown", timer.name, timer.ends_at // USEC if timer.running else 0)
+    return ("alarm", timer.name, int(timer.when.timestamp()) if timer.deadline is not None else 0)
+
+
+def query_state():
+    """Every State property from the running app as a dict, or None.
+
+    Never starts the app: scripts fall back to probing for themselves.
+    """
+    try:
+        bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        reply = bus.call_sync(
+            APP_ID, STATE_PATH, "org.freedesktop.DBus.Properties", "GetAll",
+            GLib.Variant("(s)", (STATE_INTERFACE,)), GLib.VariantType("(a{sv})"),
+            Gio.DBusCallFlags.NO_AUTO_START, 1000, None,
+        )
+    except GLib.Error:
+        return None
+    return reply.unpack()[0]
+
+
+# =============================================================================
+# HEADLESS CLI
+# =============================================================================
+# `kysettings <command>` works from scripts, login hooks and ssh sessions:
+# it runs before Gtk and Adw are imported (see the bottom of this section)
+# and exits without ever opening a window.
+
+CLI_USAGE = """\
+usage: kysettings                      open the window
+       kysettings status [--json]      print current settings
+       kysettings apply KEY=VALUE...   change settings in one go
+       kysettings proxy on|off         shorthand for apply proxy=on|off
+
+keys:
+  desktop=kyle|ubuntu   theme, wallpaper, fonts and dock
+  blank=SECONDS         monitor off timeout (0 = never)
+  pin=on|off            Ky Settings in the dash
+  topbar=on|off         Hide Top Bar extension
+  bluetooth=on|off      adapter power
+  proxy=on|off          PDANet+ system proxy (gsettings, env vars, apt)
+  transparent=on|off    redsocks transparent proxy
+"""
+
+
+def _parse_switch(value):
+    if value in ("on", "true", "yes", "1"):
+        return True
+    if value in ("off", "false", "no", "0"):
+        return False
+    raise ValueError(f"expected on or off, got {value!r}")
+
+
+def _parse_desktop(value):
+    if value not in ("kyle", "ubuntu"):
+        raise ValueError(f"expected kyle or ubuntu, got {value!r}")
+    return value == "kyle"
+
+
+def _parse_seconds(value):
+    if not value.isdigit():
+        raise ValueError(f"expected seconds, got {value!r}")
+    return int(value)
+
+
+def _is_focus_audio_running():
+    try:
+        return run_command(["systemctl", "--user", "is-active", "--quiet", FOCUS_AUDIO_UNIT]).returncode == 0
+    except Exception:
+        return False
+
+
+def _timer_counts():
+    try:
+        saved = json.loads(TIMERS_FILE.read_text())
+    except (OSError, ValueError):
+        return {"alarms": 0, "countdowns": 0}
+    return {"alarms": len(saved.get("alarms", [])), "countdowns": len(saved.get("countdowns", []))}
+
+
+def cli_status():
+    """Current state, from the running app's State interface if it's up.
+
+    Otherwise it's probed here; the probes that spawn a process run in
+    parallel.
+    """
+    state = query_state()
+    if state is not None:
+        kinds = [kind for kind, _, _ in state["Timers"]]
+        return {
+            "desktop": state["Desktop"],
+            "blank": state["BlankSeconds"],
+            "pin": state["Pinned"],
+            "proxy": state["ProxyMode"] == "pdanet",
+            "transparent": state["TransparentProxy"],
+            "timers": {"alarms": kinds.count("alarm"), "countdowns": kinds.count("countdown")},
+            "bluetooth": state["Bluetooth"],
+            "topbar": state["HideTopBar"],
+            "focus_audio": state["AutoMute"],
+        }
+    probes = {
+        "bluetooth": is_bluetooth_powered,
+        "topbar": is_hide_top_bar_enabled,
+        "focus_audio": _is_focus_audio_running,
+    }
+    with concurrent.futures.ThreadPoolExecutor(len(probes)) as pool:
+        pending = {key: pool.submit(probe) for key, probe in probes.items()}
+        status = {
+            "desktop": "kyle" if is_kyle_desktop() else "ubuntu",
+            "blank": blank_seconds(),
+            "pin": is_pinned(),
+            "proxy": is_pdanet_proxy_active(),
+            "transparent": is_redsocks_proxy_running(),
+            "timers": _timer_counts(),
+        }
+        status.update({key: future.result() for key, future in pending.items()})
+    return status
+
+
+def _apply_bluetooth(on):
+    result = run_command(["bluetoothctl", "power", "on" if on else "off"])
+    return None if result.returncode == 0 else (result.stdout + result.stderr).strip() or "failed"
+
+
+def _apply_desktop(use_kyle):
+    applied, errors = apply_desktop(use_kyle)
+    return "; ".join(errors) if errors else None
+
+
+def _apply_blank(seconds):
+    DisplayPower().reconcile(seconds)
+
+
+def _apply_proxy(on):
+    (pdanet_proxy_enable if on else pdanet_proxy_disable)()
+
+
+# key -> (parse, apply on a worker thread -> error or None, root helper step or None)
+CLI_KEYS = {
+    "desktop": (_parse_desktop, _apply_desktop, None),
+    "blank": (_parse_seconds, _apply_blank, None),
+    "pin": (_parse_switch, lambda on: None if set_pinned(on) else "org.gnome.shell not installed", None),
+    "topbar": (_parse_switch, set_hide_top_bar, None),
+    "bluetooth": (_parse_switch, _apply_bluetooth, None),
+    "proxy": (_parse_switch, _apply_proxy,
+              lambda root, on, done: pdanet_apt_proxy(root, on, done)),
+    "transparent": (_parse_switch, None,
+                    lambda root, on, done: root.call(
+                        "ProxyStart" if on else "ProxyStop", None,
+                        [os.path.expanduser("~/.local/bin/pdanet-proxy"), "start" if on else "stop"],
+                        on_done=done)),
+}
+
+
+def cli_apply(pairs):
+    """Apply KEY=VALUE pairs; every value is checked before anything changes.
+
+    Returns a list of error messages.
+    """
+    changes = []
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep or key not in CLI_KEYS:
+            raise ValueError(f"unknown setting {pair!r}")
+        try:
+            changes.append((key, CLI_KEYS[key][0](value.strip().lower())))
+        except ValueError as e:
+            raise ValueError(f"{key}: {e}") from None
+
+    errors = []
+    with concurrent.futures.ThreadPoolExecutor(len(changes)) as pool:
+        pending = [(key, pool.submit(CLI_KEYS[key][1], value))
+                   for key, value in changes if CLI_KEYS[key][1]]
+        for key, future in pending:
+            try:
+                error = future.result()
+            except Exception as e:
+                error = str(e)
+            if error:
+                errors.append(f"{key}: {error}")
+
+    # Root-only steps go through the privileged helper, one main loop for all
+    root_steps = [(key, value) for key, value in changes if CLI_KEYS[key][2]]
+    if root_steps:
+        loop = GLib.MainLoop()
+        waiting = [key for key, _ in root_steps]
+
+        def finished(key):
+            def on_done(ok, output):
+                if not ok:
+                    errors.append(f"{key}: {output or 'failed'}")
+                waiting.remove(key)
+                if not waiting:
+                    loop.quit()
+            return on_done
+
+        root = RootHelper()
+        for key, value in root_steps:
+            CLI_KEYS[key][2](root, value, finished(key))
+        loop.run()
+
+    Gio.Settings.sync()  # dconf writes are async; land them before exiting
+    return errors
+
+
+def _format_status(value):
+    if isinstance(value, bool):
+        return "on" if value else "off"
+    if isinstance(value, dict):
+        return ", ".join(f"{v} {k}" for k, v in value.items())
+    return "unknown" if value is None else str(value)
+
+
+def cli_main(args):
+    command, rest = args[0], args[1:]
+    try:
+        if command in ("-h", "--help", "help"):
+            print(CLI_USAGE, end="")
+            return 0
+        if command == "status" and rest in ([], ["--json"]):
+            status = cli_status()
+            if rest:
+                print(json.dumps(status))
+            else:
+                for key, value in status.items():
+                    print(f"{key + ':':<13} {_format_status(value)}")
+            return 0
+        if command == "apply" and rest:
+            errors = cli_apply(rest)
+        elif command == "proxy" and len(rest) == 1:
+            errors = cli_apply([f"proxy={rest[0]}"])
+        else:
+            print(CLI_USAGE, end="", file=sys.stderr)
+            return 2
+    except ValueError as e:
+        print(f"kysettings: {e}", file=sys.stderr)
+        return 2
+    for error in errors:
+        print(f"kysettings: {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+# --gapplication-service is how D-Bus activation starts the resident window
+if __name__ == "__main__" and len(sys.argv) > 1 and not sys.argv[1].startswith("--gapplication"):
+    sys.exit(cli_main(sys.argv[1:]))
+
+# Everything below is the window
+gi.require_version('Gtk', '4.0')
+gi.require_version('Adw', '1')
+from gi.repository import Gtk, Adw  # noqa: E402
+
+
 class KySettings(Adw.Application):
     def __init__(self):
         super().__init__(application_id='com.ky.settings')
+        self.connect('startup', self.on_startup)
         self.connect('activate', self.on_activate)
+        self.win = None
+        self.watchdog = StallWatchdog.from_env()
+        if self.watchdog:
+            self.connect('shutdown', lambda app: print(self.watchdog.report()))
+
+        # Background work: root helper, package installs, blocking probes;
+        # supervisor and state come up in on_startup
+        self.root = RootHelper()
+        self.installs = InstallJobs(self.root)
+        self.workers = WorkerPool()
+        self.supervisor = None
+        self.state = None
 
         # Timer state
-        self.stopwatch_running = False
-        self.stopwatch_start = None
-        self.stopwatch_elapsed = timedelta()
-        self.stopwatch_timer_id = None
+        self.stopwatch = Stopwatch()
+        self.timers = TimerScheduler(self.on_timer_fired)
+        self.timer_rows = {}
+        self.timers.load()
 
-        self.countdown_running = False
-        self.countdown_remaining = timedelta()
-        self.countdown_timer_id = None
+        self._initializing = True
 
-        self.alarm_time = None
-        self.alarm_enabled = False
-        self.alarm_timer_id = None
+    def on_startup(self, app):
+        # Stay resident once the window closes: timers, watchers and every
+        # page stay live, and the next activation only has to present it.
+        self.hold()
+        quit_action = Gio.SimpleAction.new("quit", None)
+        quit_action.connect("activate", lambda action, param: self.quit())
+        self.add_action(quit_action)
+        self.set_accels_for_action("app.quit", ["<Control>q"])
 
-        self._initializing = True
+        # Long-lived helpers run as systemd user units
+        try:
+            self.supervisor = ServiceSupervisor()
+        except (GLib.Error, OSError) as e:
+            print(f"systemd user manager unavailable: {e}")
+        else:
+            # Alarms ring from systemd timers from here on, app open or not
+            self.timers.attach(self.supervisor)
+
+        # com.ky.settings.State, for the CLI, scripts and our own rows
+        connection = self.get_dbus_connection()
+        if connection is not None:
+            self.state = StateService(connection, self.workers)
+            if self.supervisor:
+                self.state.follow_unit(self.supervisor)
+            self.state.follow_timers(self.timers)
 
     def on_activate(self, app):
+        if self.win is not None:
+            self._refresh_unwatched()
+            self.win.present()
+            return
+
         self.win = Adw.ApplicationWindow(application=app)
         self.win.set_title("Ky Settings")
         self.win.set_default_size(500, 500)
+        self.win.set_hide_on_close(True)
+        self.win.connect("notify::visible", self._on_window_visible)
 
         # Main layout
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
         header = Adw.HeaderBar()
+        menu = Gio.Menu()
+        menu.append("Quit", "app.quit")
+        menu_btn = Gtk.MenuButton(icon_name="open-menu-symbolic", menu_model=menu)
+        menu_btn.set_tooltip_text("Main Menu")
+        header.pack_end(menu_btn)
         box.append(header)
 
         # Stack for multiple pages
@@ -56,6 +2531,7 @@ class KySettings(Adw.Application):
         self.add_wireless_page()
         self.add_keyboard_page()
         self.add_timers_page()
+        self.add_diagnostics_page()
 
         self._initializing = False
 
@@ -67,6 +2543,8 @@ class KySettings(Adw.Application):
 
         box.append(self.stack)
         self.win.set_content(box)
+        if self.state:
+            self.state.listen(self._on_state_changed)
         self.win.present()
 
         if not FIRST_RUN_FLAG.exists():
@@ -75,16 +2553,73 @@ class KySettings(Adw.Application):
             FIRST_RUN_FLAG.parent.mkdir(parents=True, exist_ok=True)
             FIRST_RUN_FLAG.touch()
 
+    def _on_state_changed(self, name, value):
+        """Keep rows in step with changes made elsewhere (the CLI, gsettings,
+        GNOME Settings) — a resident window can stay hidden for days."""
+        if name == "ProxyMode":
+            self._show_state(self.pda_toggle_row, value == "pdanet")
+        elif name == "TransparentProxy":
+            if self.pda_redsocks_toggle.get_sensitive():  # not mid-toggle, redsocks installed
+                self._show_state(self.pda_redsocks_toggle, value)
+                self._set_traffic_monitor(value and self.win.get_visible())
+        elif name == "Bluetooth":
+            self._show_state(self.bt_power_row, value)
+        elif name == "HideTopBar":
+            self._show_state(self.hide_bar_row, value)
+        elif name == "Desktop":
+            self._show_state(self.desktop_row, value == "kyle")
+        elif name == "Pinned":
+            self._show_state(self.pin_row, value)
+        elif name == "BlankSeconds":
+            for i, (_, seconds) in enumerate(self.blank_options):
+                if seconds == value and self.blank_row.get_selected() != i:
+                    self._initializing = True
+                    self.blank_row.set_selected(i)
+                    self._initializing = False
+
+    def _on_window_visible(self, win, _pspec):
+        if not win.get_visible():
+            # Nothing to draw while hidden; _refresh_unwatched() restarts it
+            self._set_traffic_monitor(False)
+
+    def _refresh_unwatched(self):
+        """Re-probe the state no signal tells us about, off the main loop."""
+        if self.state:
+            # BlueZ and GNOME Shell signals cover these; this is a backstop
+            self.state.refresh()
+            if self.pda_redsocks_toggle.get_sensitive():
+                self._set_traffic_monitor(self.state.values["TransparentProxy"])
+            return
+        self._bluetooth_refresh_state()
+        self.workers.submit(
+            is_hide_top_bar_enabled, resource="hide-top-bar",
+            on_done=lambda enabled, error: self._show_state(self.hide_bar_row, bool(enabled)),
+        )
+        if self.pda_redsocks_toggle.get_sensitive():  # not mid-toggle, redsocks installed
+            running = is_redsocks_proxy_running()
+            self._show_state(self.pda_redsocks_toggle, running)
+            self._set_traffic_monitor(running)
+
+    def _seed_row(self, row, name, probe, resource):
+        """Start a switch from the State snapshot — its probes already ran on
+        the worker pool — or, without one, probe there now."""
+        if self.state:
+            row.set_active(self.state.values[name])
+        else:
+            self.workers.submit(probe, resource=resource,
+                                on_done=lambda active, error: self._show_state(row, bool(active)))
+
+    def _show_state(self, row, active):
+        """Reflect outside state on a switch without running its handler."""
+        if row.get_active() != active:
+            self._initializing = True
+            row.set_active(active)
+            self._initializing = False
+
     def pin_to_dash(self):
         """Pin app to GNOME dash on first run."""
-        try:
-            settings = Gio.Settings.new("org.gnome.shell")
-            favorites = list(settings.get_strv("favorite-apps"))
-            if "com.ky.settings.desktop" not in favorites:
-                favorites.append("com.ky.settings.desktop")
-                settings.set_strv("favorite-apps", favorites)
-        except Exception as e:
-            print(f"Could not pin to dash: {e}")
+        if not set_pinned(True):
+            print("Could not pin to dash")
 
     def show_welcome(self):
         dialog = Adw.MessageDialog(
@@ -99,33 +2634,6 @@ class KySettings(Adw.Application):
         dialog.add_response("ok", "Got it")
         dialog.present()
 
-    # (schema, key, kyle_value, ubuntu_default)
-    DESKTOP_SETTINGS = [
-        # Theme
-        ("org.gnome.desktop.interface", "gtk-theme", "Yaru-sage-dark", "Yaru-dark"),
-        ("org.gnome.desktop.interface", "color-scheme", "prefer-dark", "prefer-dark"),
-        ("org.gnome.desktop.interface", "icon-theme", "Yaru-sage", "Yaru"),
-        ("org.gnome.desktop.interface", "cursor-theme", "Yaru", "Yaru"),
-        # Fonts
-        ("org.gnome.desktop.interface", "font-name", "Ubuntu Sans 11", "Ubuntu Sans 11"),
-        ("org.gnome.desktop.interface", "document-font-name", "Sans 11", "Sans 11"),
-        ("org.gnome.desktop.interface", "monospace-font-name", "Ubuntu Sans Mono 13", "Ubuntu Mono 13"),
-        # Wallpaper
-        ("org.gnome.desktop.background", "picture-uri-dark",
-         "file:///usr/share/backgrounds/Fuji_san_by_amaral.png",
-         "file:///usr/share/backgrounds/ubuntu-wallpaper-d.png"),
-        ("org.gnome.desktop.background", "picture-uri",
-         "file:///usr/share/backgrounds/Fuji_san_by_amaral.png",
-         "file:///usr/share/backgrounds/ubuntu-wallpaper-d.png"),
-        ("org.gnome.desktop.background", "picture-options", "zoom", "zoom"),
-        # Dock
-        ("org.gnome.shell.extensions.dash-to-dock", "dock-position", "BOTTOM", "LEFT"),
-        ("org.gnome.shell.extensions.dash-to-dock", "dash-max-icon-size", 38, 48),
-        ("org.gnome.shell.extensions.dash-to-dock", "autohide", True, False),
-        # Compositor
-        ("org.gnome.mutter", "center-new-windows", False, False),
-    ]
-
     def add_display_page(self):
         page = Adw.PreferencesPage()
         page.set_title("Display")
@@ -138,16 +2646,18 @@ class KySettings(Adw.Application):
         desktop_row = Adw.SwitchRow()
         desktop_row.set_title("Kyle's Desktop")
         desktop_row.set_subtitle("ON = Kyle's settings / OFF = Ubuntu defaults")
-        desktop_row.set_active(self._detect_kyle_desktop())
+        desktop_row.set_active(is_kyle_desktop())
         desktop_row.connect("notify::active", self.on_desktop_toggle)
         desktop_group.add(desktop_row)
+        self.desktop_row = desktop_row
 
         hide_bar_row = Adw.SwitchRow()
         hide_bar_row.set_title("Hide Top Bar")
         hide_bar_row.set_subtitle("Auto-hide the GNOME top bar")
-        hide_bar_row.set_active(self._is_hide_top_bar_enabled())
+        self._seed_row(hide_bar_row, "HideTopBar", is_hide_top_bar_enabled, "hide-top-bar")
         hide_bar_row.connect("notify::active", self.on_hide_top_bar_toggle)
         desktop_group.add(hide_bar_row)
+        self.hide_bar_row = hide_bar_row
 
         logout_row = Adw.ActionRow()
         logout_row.set_title("Restart Session")
@@ -199,9 +2709,12 @@ class KySettings(Adw.Application):
 
         row.connect("notify::selected", self.on_blank_changed)
         group.add(row)
+        self.blank_row = row
 
-        # Apply DPMS monitor-off on startup to match current setting
-        self._set_monitor_off(current)
+        # Apply DPMS monitor-off on startup to match current setting; a no-op
+        # (no writes, no processes) when it already does
+        self.display_power = DisplayPower()
+        self.display_power.reconcile(current)
 
         page.add(group)
 
@@ -213,9 +2726,10 @@ class KySettings(Adw.Application):
         pin_row = Adw.SwitchRow()
         pin_row.set_title("Pin to Dash")
         pin_row.set_subtitle("Keep Ky Settings in the dock")
-        pin_row.set_active(self.is_pinned_to_dash())
+        pin_row.set_active(is_pinned())
         pin_row.connect("notify::active", self.on_pin_toggle)
         app_group.add(pin_row)
+        self.pin_row = pin_row
 
         page.add(app_group)
 
@@ -223,90 +2737,65 @@ class KySettings(Adw.Application):
         audio_group = Adw.PreferencesGroup()
         audio_group.set_title("Gaming")
 
-        # Minecraft auto-mute install row
-        mc_install_row = Adw.ActionRow()
-        mc_install_row.set_title("Minecraft Auto-Mute Script")
-        mc_install_row.set_subtitle("For standard Minecraft Java Edition on Linux")
-        self.mc_install_btn = Gtk.Button(label="Installed" if self.is_mc_mute_installed() else "Install")
-        self.mc_install_btn.set_valign(Gtk.Align.CENTER)
-        self.mc_install_btn.set_sensitive(not self.is_mc_mute_installed())
-        self.mc_install_btn.connect("clicked", self.on_mc_mute_install)
-        mc_install_row.add_suffix(self.mc_install_btn)
-        audio_group.add(mc_install_row)
-
-        # Minecraft auto-mute toggle
-        mc_mute_row = Adw.SwitchRow()
-        mc_mute_row.set_title("Minecraft Auto-Mute")
-        mc_mute_row.set_subtitle("Mute Minecraft Java Edition when window loses focus")
-        mc_mute_row.set_active(self.is_minecraft_mute_running())
-        mc_mute_row.set_sensitive(self.is_mc_mute_installed())
-        mc_mute_row.connect("notify::active", self.on_minecraft_mute_toggle)
-        audio_group.add(mc_mute_row)
-        self.mc_mute_row = mc_mute_row
+        # Focus audio install row
+        fa_install_row = Adw.ActionRow()
+        fa_install_row.set_title("Focus Audio Script")
+        fa_install_row.set_subtitle("Per-app volume that follows window focus (X11)")
+        self.fa_install_btn = Gtk.Button(label="Installed" if self.is_focus_audio_installed() else "Install")
+        self.fa_install_btn.set_valign(Gtk.Align.CENTER)
+        self.fa_install_btn.set_sensitive(not self.is_focus_audio_installed())
+        self.fa_install_btn.connect("clicked", self.on_focus_audio_install)
+        fa_install_row.add_suffix(self.fa_install_btn)
+        audio_group.add(fa_install_row)
+        self.fa_install_row = fa_install_row
+
+        # Focus audio toggle
+        fa_row = Adw.SwitchRow()
+        fa_row.set_title("Focus Audio")
+        fa_row.set_subtitle(self.FOCUS_AUDIO_SUBTITLE)
+        fa_row.set_sensitive(self.is_focus_audio_installed() and self.supervisor is not None)
+        fa_row.connect("notify::active", self.on_focus_audio_toggle)
+        audio_group.add(fa_row)
+        self.fa_row = fa_row
+        if self.supervisor:
+            self.supervisor.watch(FOCUS_AUDIO_UNIT, self._on_focus_audio_state)
 
         page.add(audio_group)
 
-        self.stack.add_titled(page, "display", "Display")
+        # One expander per rule, edited in place and saved to AUDIO_RULES_FILE
+        self.audio_rules = self._load_audio_rules()
+        self.audio_rules_group = Adw.PreferencesGroup()
+        self.audio_rules_group.set_title("Focus Audio Rules")
+        self.audio_rules_group.set_description(
+            "Match windows by WM_CLASS, title regex or process name. "
+            "First matching rule wins."
+        )
+        add_btn = Gtk.Button.new_from_icon_name("list-add-symbolic")
+        add_btn.set_tooltip_text("Add Rule")
+        add_btn.add_css_class("flat")
+        add_btn.connect("clicked", self.on_audio_rule_add)
+        self.audio_rules_group.set_header_suffix(add_btn)
+        self.audio_rule_rows = []
+        self._audio_rules_save_id = None
+        for rule in self.audio_rules:
+            self._add_audio_rule_row(rule)
+        page.add(self.audio_rules_group)
 
-    def is_pinned_to_dash(self):
-        """Check if app is in GNOME favorites."""
-        try:
-            settings = Gio.Settings.new("org.gnome.shell")
-            favorites = settings.get_strv("favorite-apps")
-            return "com.ky.settings.desktop" in favorites
-        except:
-            return False
+        self.stack.add_titled(page, "display", "Display")
 
     def on_pin_toggle(self, row, _):
         """Add or remove app from GNOME dash favorites."""
         if self._initializing:
             return
-        try:
-            settings = Gio.Settings.new("org.gnome.shell")
-            favorites = list(settings.get_strv("favorite-apps"))
-
-            if row.get_active():
-                if "com.ky.settings.desktop" not in favorites:
-                    favorites.append("com.ky.settings.desktop")
-            else:
-                if "com.ky.settings.desktop" in favorites:
-                    favorites.remove("com.ky.settings.desktop")
-
-            settings.set_strv("favorite-apps", favorites)
-        except Exception as e:
-            print(f"Error toggling pin: {e}")
-
-    def _detect_kyle_desktop(self):
-        """Check if current desktop matches Kyle's settings (by gtk-theme)."""
-        try:
-            s = Gio.Settings.new("org.gnome.desktop.interface")
-            return s.get_string("gtk-theme") == "Yaru-sage-dark"
-        except Exception:
-            return False
+        if not set_pinned(row.get_active()):
+            print("Error toggling pin")
 
     def on_desktop_toggle(self, row, _pspec):
         """Toggle between Kyle's desktop settings and Ubuntu defaults."""
         if self._initializing:
             return
         use_kyle = row.get_active()
-        # Index 2 = kyle_value, index 3 = ubuntu_default
-        idx = 2 if use_kyle else 3
-        applied = 0
-        errors = []
-        for entry in self.DESKTOP_SETTINGS:
-            schema, key, kyle_val, default_val = entry
-            value = kyle_val if use_kyle else default_val
-            try:
-                s = Gio.Settings.new(schema)
-                if isinstance(value, bool):
-                    s.set_boolean(key, value)
-                elif isinstance(value, int):
-                    s.set_int(key, value)
-                else:
-                    s.set_string(key, value)
-                applied += 1
-            except Exception as e:
-                errors.append(f"{schema}.{key}: {e}")
+        applied, errors = apply_desktop(use_kyle)
 
         label = "Kyle's settings" if use_kyle else "Ubuntu defaults"
         if errors:
@@ -322,8 +2811,6 @@ class KySettings(Adw.Application):
         dialog.add_response("ok", "OK")
         dialog.present()
 
-    HIDE_TOP_BAR_UUID = "hidetopbar@mathieu.bidon.ca"
-
     def on_restart_session(self, button):
         """Log out with confirmation dialog."""
         dialog = Adw.MessageDialog(
@@ -340,190 +2827,210 @@ class KySettings(Adw.Application):
 
     def _on_logout_response(self, dialog, response):
         if response == "logout":
-            subprocess.Popen(["gnome-session-quit", "--no-prompt"])
-
-    def _is_hide_top_bar_enabled(self):
-        """Check if Hide Top Bar extension is installed and active."""
-        try:
-            result = subprocess.run(
-                ["gnome-extensions", "info", self.HIDE_TOP_BAR_UUID],
-                capture_output=True, text=True, timeout=5
-            )
-            return "State: ACTIVE" in result.stdout or "State: ENABLED" in result.stdout
-        except Exception:
-            return False
-
-    def _is_hide_top_bar_installed(self):
-        """Check if Hide Top Bar extension is installed."""
-        try:
-            result = subprocess.run(
-                ["gnome-extensions", "info", self.HIDE_TOP_BAR_UUID],
-                capture_output=True, text=True, timeout=5
-            )
-            return result.returncode == 0
-        except Exception:
-            return False
-
-    def _install_hide_top_bar_via_dbus(self):
-        """Install Hide Top Bar via GNOME Shell dbus (triggers scan + enable)."""
-        try:
-            subprocess.run(
-                ["gdbus", "call", "--session",
-                 "--dest", "org.gnome.Shell.Extensions",
-                 "--object-path", "/org/gnome/Shell/Extensions",
-                 "--method", "org.gnome.Shell.Extensions.InstallRemoteExtension",
-                 self.HIDE_TOP_BAR_UUID],
-                capture_output=True, timeout=15
-            )
-            return True
-        except Exception as e:
-            print(f"Failed to install Hide Top Bar via dbus: {e}")
-            return False
+            spawn_command(["gnome-session-quit", "--no-prompt"])
 
     def on_hide_top_bar_toggle(self, row, _pspec):
         """Enable or disable the Hide Top Bar extension."""
         if self._initializing:
             return
         enable = row.get_active()
+        row.set_subtitle("Enabling..." if enable else "Disabling...")
+        self.workers.submit(
+            set_hide_top_bar, enable, resource="hide-top-bar", replace=True,
+            on_done=lambda failure, error: self._hide_top_bar_done(row, enable, failure),
+        )
 
-        if enable and not self._is_hide_top_bar_installed():
-            row.set_subtitle("Installing extension...")
-            if not self._install_hide_top_bar_via_dbus():
-                row.set_subtitle("Install failed — check internet connection")
-                row.set_active(False)
-                return
-            # dbus install auto-enables, so we're done
-            row.set_subtitle("Auto-hide the GNOME top bar")
-            return
-
-        action = "enable" if enable else "disable"
-        try:
-            subprocess.run(
-                ["gnome-extensions", action, self.HIDE_TOP_BAR_UUID],
-                capture_output=True, timeout=5
-            )
-        except Exception as e:
-            print(f"Failed to {action} Hide Top Bar: {e}")
+    def _hide_top_bar_done(self, row, enable, failure):
+        if failure and row.get_active() == enable:
+            self._initializing = True
             row.set_active(not enable)
-        row.set_subtitle("Auto-hide the GNOME top bar")
-
-    def is_mc_mute_installed(self):
-        """Check if minecraft-auto-mute script and deps are installed."""
-        script = os.path.expanduser("~/.local/bin/minecraft-auto-mute.sh")
-        return os.path.exists(script)
-
-    def is_minecraft_mute_running(self):
-        """Check if minecraft-auto-mute.sh is running."""
-        try:
-            result = subprocess.run(
-                ["pgrep", "-f", "minecraft-auto-mute"],
-                capture_output=True
-            )
-            return result.returncode == 0
-        except:
-            return False
+            self._initializing = False
+        row.set_subtitle(failure or "Auto-hide the GNOME top bar")
+
+    def _copy_helper_script(self, name):
+        """Copy a helper from the repo's scripts/ dir into ~/.local/bin."""
+        src = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts", name)
+        dst = os.path.expanduser(f"~/.local/bin/{name}")
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if os.path.exists(src):
+            shutil.copy2(src, dst)
+            if not name.endswith(".py"):
+                os.chmod(dst, 0o755)
+
+    FOCUS_AUDIO_SCRIPT = os.path.expanduser("~/.local/bin/focus-audio")
+
+    def is_focus_audio_installed(self):
+        """Check if the focus-audio watcher and its X11 helper are installed."""
+        return (os.path.exists(self.FOCUS_AUDIO_SCRIPT)
+                and os.path.exists(os.path.expanduser("~/.local/bin/kyx11.py")))
+
+    FOCUS_AUDIO_SUBTITLE = "Apply the rules below when windows gain or lose focus"
+
+    def is_focus_audio_running(self):
+        """Check if the focus-audio unit is up (cached from systemd signals)."""
+        return bool(self.supervisor) and self.supervisor.is_active(FOCUS_AUDIO_UNIT)
+
+    def _on_focus_audio_state(self, unit, active, sub):
+        """systemd reported a state change — mirror it on the switch."""
+        self._initializing = True
+        self.fa_row.set_active(self.supervisor.is_active(FOCUS_AUDIO_UNIT) or sub == "auto-restart")
+        self._initializing = False
+        if sub == "auto-restart":
+            self.fa_row.set_subtitle("Helper crashed — restarting…")
+        elif active == "failed":
+            self.fa_row.set_subtitle("Helper keeps failing — see journalctl --user -u " + FOCUS_AUDIO_UNIT)
+        else:
+            self.fa_row.set_subtitle(self.FOCUS_AUDIO_SUBTITLE)
 
-    def on_mc_mute_install(self, button):
-        """Install minecraft-auto-mute script and dependencies."""
+    def on_focus_audio_install(self, button):
+        """Install the focus-audio watcher (python3 + libX11 + PipeWire tools)."""
         button.set_sensitive(False)
         button.set_label("Installing...")
-
-        # Install xdotool if missing
-        try:
-            subprocess.run(["which", "xdotool"], check=True, capture_output=True)
-        except subprocess.CalledProcessError:
-            subprocess.Popen(
-                ["pkexec", "apt", "install", "-y", "xdotool"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-
-        # Write the script
-        script_path = os.path.expanduser("~/.local/bin/minecraft-auto-mute.sh")
-        os.makedirs(os.path.dirname(script_path), exist_ok=True)
-        script_content = '''#!/bin/bash
-# Auto-mute Minecraft when window loses focus
-# Uses PipeWire (wpctl) and xdotool for window monitoring
-
-MINECRAFT_MUTED=false
-
-get_minecraft_stream_id() {
-    wpctl status | sed -n '/Streams:/,/^$/p' | grep -E "^\\s+[0-9]+\\. java" | head -1 | awk '{print $1}' | tr -d '.'
-}
-
-mute_minecraft() {
-    local stream_id=$(get_minecraft_stream_id)
-    if [[ -n "$stream_id" && "$MINECRAFT_MUTED" == "false" ]]; then
-        wpctl set-mute "$stream_id" 1
-        MINECRAFT_MUTED=true
-    fi
-}
-
-unmute_minecraft() {
-    local stream_id=$(get_minecraft_stream_id)
-    if [[ -n "$stream_id" && "$MINECRAFT_MUTED" == "true" ]]; then
-        wpctl set-mute "$stream_id" 0
-        MINECRAFT_MUTED=false
-    fi
-}
-
-is_minecraft_focused() {
-    local active_window=$(xdotool getactivewindow 2>/dev/null)
-    if [[ -z "$active_window" ]]; then
-        return 1
-    fi
-    local window_class=$(xprop -id "$active_window" WM_CLASS 2>/dev/null | grep -i minecraft)
-    local window_name=$(xdotool getwindowname "$active_window" 2>/dev/null)
-    if [[ -n "$window_class" ]] || [[ "$window_name" == *"Minecraft"* ]]; then
-        return 0
-    fi
-    return 1
-}
-
-if is_minecraft_focused; then
-    MINECRAFT_MUTED=false
-else
-    mute_minecraft
-fi
-
-xprop -root -spy _NET_ACTIVE_WINDOW 2>/dev/null | while read -r line; do
-    if is_minecraft_focused; then
-        unmute_minecraft
-    else
-        mute_minecraft
-    fi
-done
-'''
-        with open(script_path, 'w') as f:
-            f.write(script_content)
-        os.chmod(script_path, 0o755)
-
-        GLib.timeout_add(3000, self._mc_mute_install_done)
-
-    def _mc_mute_install_done(self):
-        if self.is_mc_mute_installed():
-            self.mc_install_btn.set_label("Installed")
-            self.mc_mute_row.set_sensitive(True)
+        self._copy_helper_script("kyx11.py")
+        self._copy_helper_script("focus-audio")
+        self._focus_audio_install_done()
+
+    def _focus_audio_install_done(self):
+        if self.is_focus_audio_installed():
+            self.fa_install_btn.set_label("Installed")
+            self.fa_row.set_sensitive(self.supervisor is not None)
         else:
-            self.mc_install_btn.set_label("Install")
-            self.mc_install_btn.set_sensitive(True)
+            self.fa_install_btn.set_label("Install")
+            self.fa_install_btn.set_sensitive(True)
         return False
 
-    def on_minecraft_mute_toggle(self, row, _):
-        """Start or stop the Minecraft auto-mute script."""
+    def on_focus_audio_toggle(self, row, _):
+        """Start or stop the focus-audio unit (and whether it starts with the session)."""
         if self._initializing:
             return
-        script_path = os.path.expanduser("~/.local/bin/minecraft-auto-mute.sh")
-
         if row.get_active():
-            subprocess.Popen(
-                [script_path],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                start_new_session=True
-            )
+            self.supervisor.start(FOCUS_AUDIO_UNIT, enable=True)
         else:
-            subprocess.run(["pkill", "-f", "minecraft-auto-mute"], capture_output=True)
+            self.supervisor.stop(FOCUS_AUDIO_UNIT, disable=True)
+
+    # === FOCUS AUDIO RULES ===
+    def _load_audio_rules(self):
+        try:
+            with open(AUDIO_RULES_FILE) as f:
+                rules = json.load(f)
+            if isinstance(rules, list):
+                return rules
+        except (OSError, ValueError):
+            pass
+        return [dict(r) for r in DEFAULT_AUDIO_RULES]
+
+    def _add_audio_rule_row(self, rule):
+        row = Adw.ExpanderRow()
+        row.set_title(GLib.markup_escape_text(rule.get("name") or "New Rule"))
+
+        fields = [
+            ("name", "Name"),
+            ("wm_class", "WM_CLASS Contains"),
+            ("title", "Title Regex"),
+            ("process", "Process Name"),
+        ]
+        for key, label in fields:
+            entry = Adw.EntryRow()
+            entry.set_title(label)
+            entry.set_text(rule.get(key, ""))
+            entry.connect("changed", self._on_audio_rule_text, rule, key, row)
+            row.add_row(entry)
+
+        streams = Adw.EntryRow()
+        streams.set_title("Audio From (binaries, comma separated — blank = window's process)")
+        streams.set_text(", ".join(rule.get("streams", [])))
+        streams.connect("changed", self._on_audio_rule_streams, rule)
+        row.add_row(streams)
+
+        for key, label, upper, step in (
+            ("focused", "Focused Volume (%)", 150, 5),
+            ("unfocused", "Unfocused Volume (%)", 150, 5),
+            ("fade_ms", "Fade (ms)", 5000, 50),
+        ):
+            spin = Adw.SpinRow.new_with_range(0, upper, step)
+            spin.set_title(label)
+            spin.set_value(rule.get(key, 0))
+            spin.connect("notify::value", self._on_audio_rule_number, rule, key, row)
+            row.add_row(spin)
+
+        delete_row = Adw.ActionRow()
+        delete_row.set_title("Remove Rule")
+        delete_btn = Gtk.Button(label="Remove")
+        delete_btn.set_valign(Gtk.Align.CENTER)
+        delete_btn.add_css_class("destructive-action")
+        delete_btn.connect("clicked", self.on_audio_rule_remove, rule, row)
+        delete_row.add_suffix(delete_btn)
+        row.add_row(delete_row)
+
+        self._audio_rule_subtitle(rule, row)
+        self.audio_rules_group.add(row)
+        self.audio_rule_rows.append(row)
+
+    def _audio_rule_subtitle(self, rule, row):
+        row.set_subtitle(
+            f"{rule.get('focused', 100)}% focused · {rule.get('unfocused', 0)}% unfocused"
+            f" · {rule.get('fade_ms', 0)} ms fade"
+        )
+
+    def _on_audio_rule_text(self, entry, rule, key, row):
+        text = entry.get_text().strip()
+        if key == "title":
+            try:
+                re.compile(text)
+            except re.error as e:
+                # Keep the last good pattern saved; focus-audio would drop this one
+                entry.add_css_class("error")
+                entry.set_tooltip_text(f"Not a valid regex: {e}")
+                return
+            entry.remove_css_class("error")
+            entry.set_tooltip_text(None)
+        rule[key] = text
+        if key == "name":
+            row.set_title(GLib.markup_escape_text(rule[key] or "New Rule"))
+        self._queue_audio_rules_save()
+
+    def _on_audio_rule_streams(self, entry, rule):
+        rule["streams"] = [s.strip() for s in entry.get_text().split(",") if s.strip()]
+        self._queue_audio_rules_save()
+
+    def _on_audio_rule_number(self, spin, _pspec, rule, key, row):
+        rule[key] = int(spin.get_value())
+        self._audio_rule_subtitle(rule, row)
+        self._queue_audio_rules_save()
+
+    def on_audio_rule_add(self, button):
+        rule = {"name": "", "wm_class": "", "title": "", "process": "", "streams": [],
+                "focused": 100, "unfocused": 30, "fade_ms": 300}
+        self.audio_rules.append(rule)
+        self._add_audio_rule_row(rule)
+        self.audio_rule_rows[-1].set_expanded(True)
+
+    def on_audio_rule_remove(self, button, rule, row):
+        self.audio_rules.remove(rule)
+        self.audio_rules_group.remove(row)
+        self.audio_rule_rows.remove(row)
+        self._queue_audio_rules_save()
+
+    def _queue_audio_rules_save(self):
+        """Debounce typing: write the file once edits settle for 500ms."""
+        if self._audio_rules_save_id:
+            GLib.source_remove(self._audio_rules_save_id)
+        self._audio_rules_save_id = GLib.timeout_add(500, self._save_audio_rules)
+
+    def _save_audio_rules(self):
+        self._audio_rules_save_id = None
+        try:
+            AUDIO_RULES_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp = AUDIO_RULES_FILE.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.audio_rules, indent=2))
+            tmp.replace(AUDIO_RULES_FILE)
+        except OSError as e:
+            print(f"Could not save audio rules: {e}")
+            return False
+        # The watcher reloads its rule table on SIGHUP (the unit's ExecReload)
+        if self.supervisor:
+            self.supervisor.reload(FOCUS_AUDIO_UNIT)
+        return False
 
     # =========================================================================
     # EFFECTS PAGE
@@ -533,36 +3040,35 @@ done
         page = Adw.PreferencesPage()
         page.set_title("Effects")
 
-        bms_installed = self._is_blur_my_shell_installed()
-
         # ── Group: Blur my Shell ─────────────────────────────────────────────
         bms_group = Adw.PreferencesGroup()
         bms_group.set_title("Blur my Shell")
         bms_group.set_description("Open-source GNOME extension for frosted glass effects")
 
+        # Filled in by _bms_show_installed() once the probe is back
         bms_row = Adw.ActionRow()
         bms_row.set_title("Extension Status")
-        if bms_installed:
-            bms_row.set_subtitle("Installed and active")
-            ok_icon = Gtk.Image.new_from_icon_name("emblem-ok-symbolic")
-            ok_icon.add_css_class("success")
-            ok_icon.set_valign(Gtk.Align.CENTER)
-            bms_row.add_suffix(ok_icon)
-        else:
-            bms_row.set_subtitle("Required for effects — installs via pip + gnome-extensions")
-            self.bms_install_btn = Gtk.Button(label="Install")
-            self.bms_install_btn.set_valign(Gtk.Align.CENTER)
-            self.bms_install_btn.add_css_class("suggested-action")
-            self.bms_install_btn.connect("clicked", self.on_blur_my_shell_install)
-            bms_row.add_suffix(self.bms_install_btn)
+        bms_row.set_subtitle("Checking…")
+        self.bms_ok_icon = Gtk.Image.new_from_icon_name("emblem-ok-symbolic")
+        self.bms_ok_icon.add_css_class("success")
+        self.bms_ok_icon.set_valign(Gtk.Align.CENTER)
+        self.bms_ok_icon.set_visible(False)
+        bms_row.add_suffix(self.bms_ok_icon)
+        self.bms_install_btn = Gtk.Button(label="Install")
+        self.bms_install_btn.set_valign(Gtk.Align.CENTER)
+        self.bms_install_btn.add_css_class("suggested-action")
+        self.bms_install_btn.connect("clicked", self.on_blur_my_shell_install)
+        self.bms_install_btn.set_visible(False)
+        bms_row.add_suffix(self.bms_install_btn)
         bms_group.add(bms_row)
         page.add(bms_group)
+        self.bms_row = bms_row
 
         # ── Group: Application Windows ───────────────────────────────────────
         app_group = Adw.PreferencesGroup()
         app_group.set_title("Application Windows")
         app_group.set_description("Blur and transparency for all open windows")
-        app_group.set_sensitive(bms_installed)
+        app_group.set_sensitive(False)
 
         app_blur_row = Adw.SwitchRow()
         app_blur_row.set_title("Enable Window Effects")
@@ -609,7 +3115,7 @@ done
         panel_group = Adw.PreferencesGroup()
         panel_group.set_title("Panel and Overview")
         panel_group.set_description("Blur effects for the top bar and activities overview")
-        panel_group.set_sensitive(bms_installed)
+        panel_group.set_sensitive(False)
 
         panel_row = Adw.SwitchRow()
         panel_row.set_title("Blur Top Bar")
@@ -626,21 +3132,31 @@ done
         panel_group.add(overview_row)
 
         page.add(panel_group)
+        self.bms_groups = (app_group, panel_group)
 
         self.stack.add_titled(page, "effects", "Effects")
+        self.workers.submit(self._is_blur_my_shell_installed,
+                            on_done=lambda installed, error: self._bms_show_installed(bool(installed)))
 
     # ── Blur my Shell helpers ─────────────────────────────────────────────────
 
     def _is_blur_my_shell_installed(self):
         try:
-            result = subprocess.run(
-                ["gnome-extensions", "list"],
-                capture_output=True, text=True, timeout=5
-            )
+            result = run_command(["gnome-extensions", "list"])
             return "blur-my-shell@aunetx" in result.stdout
         except Exception:
             return False
 
+    def _bms_show_installed(self, installed):
+        if installed:
+            self.bms_row.set_subtitle("Installed and active")
+        else:
+            self.bms_row.set_subtitle("Required for effects — installs via pip + gnome-extensions")
+        self.bms_ok_icon.set_visible(installed)
+        self.bms_install_btn.set_visible(not installed)
+        for group in self.bms_groups:
+            group.set_sensitive(installed)
+
     def _bms_schema(self, sub):
         """Return a Settings object for a BMS sub-schema, or None if not installed."""
         schema_id = f"org.gnome.shell.extensions.blur-my-shell.{sub}"
@@ -688,33 +3204,32 @@ done
     def on_blur_my_shell_install(self, button):
         button.set_sensitive(False)
         button.set_label("Installing…")
-        import threading
-        threading.Thread(target=self._install_blur_my_shell, daemon=True).start()
+        # Install gnome-extensions-cli (provides `gext`) if not present
+        if not shutil.which("gext") and not os.path.exists(os.path.expanduser("~/.local/bin/gext")):
+            self.installs.run(["pip3", "install", "--user", "--quiet", "gnome-extensions-cli"],
+                              on_done=self._blur_step(self._install_blur_my_shell))
+        else:
+            self._install_blur_my_shell()
 
     def _install_blur_my_shell(self):
-        import shutil
-        try:
-            # Install gnome-extensions-cli (provides `gext`) if not present
-            if not shutil.which("gext") and not os.path.exists(os.path.expanduser("~/.local/bin/gext")):
-                subprocess.run(
-                    ["pip3", "install", "--user", "--quiet", "gnome-extensions-cli"],
-                    capture_output=True, timeout=90
-                )
-            gext = shutil.which("gext") or os.path.expanduser("~/.local/bin/gext")
-            subprocess.run([gext, "install", "blur-my-shell@aunetx"],
-                           capture_output=True, timeout=90)
-            subprocess.run(["gnome-extensions", "enable", "blur-my-shell@aunetx"],
-                           capture_output=True, timeout=10)
-            success = self._is_blur_my_shell_installed()
-        except Exception:
-            success = False
-        GLib.idle_add(self._blur_install_done, success)
+        gext = shutil.which("gext") or os.path.expanduser("~/.local/bin/gext")
+        enable = ["gnome-extensions", "enable", "blur-my-shell@aunetx"]
+        self.installs.run(
+            [gext, "install", "blur-my-shell@aunetx"],
+            on_done=self._blur_step(lambda: self.installs.run(enable, on_done=self._blur_install_done)),
+        )
+
+    def _blur_step(self, next_step):
+        """on_done for one Blur my Shell install step: the next step, or the failure."""
+        return lambda ok, output: next_step() if ok else self._blur_install_done(ok, output)
 
-    def _blur_install_done(self, success):
-        if success:
+    def _blur_install_done(self, ok, output=""):
+        if ok:
             self.bms_install_btn.set_label("Installed — log out to activate")
             self.bms_install_btn.add_css_class("success")
         else:
+            lines = output.strip().splitlines()
+            self.bms_row.set_subtitle(f"Install failed: {lines[-1][:80]}" if lines else "Install failed")
             self.bms_install_btn.set_label("Install")
             self.bms_install_btn.set_sensitive(True)
         return False
@@ -730,7 +3245,7 @@ done
         bt_power_row = Adw.SwitchRow()
         bt_power_row.set_title("Bluetooth")
         bt_power_row.set_subtitle("Turn adapter on or off")
-        bt_power_row.set_active(self.is_bluetooth_powered())
+        self._seed_row(bt_power_row, "Bluetooth", is_bluetooth_powered, "bluetooth")
         bt_power_row.connect("notify::active", self.on_bluetooth_power_toggle)
         bt_group.add(bt_power_row)
         self.bt_power_row = bt_power_row
@@ -743,6 +3258,7 @@ done
         bt_reset_btn.connect("clicked", self.on_bluetooth_reset)
         bt_reset_row.add_suffix(bt_reset_btn)
         bt_group.add(bt_reset_row)
+        self.bt_reset_row = bt_reset_row
 
         page.add(bt_group)
 
@@ -755,7 +3271,7 @@ done
         pda_toggle_row = Adw.SwitchRow()
         pda_toggle_row.set_title("PDANet+ Proxy")
         pda_toggle_row.set_subtitle("192.168.49.1:8000 — system proxy via tether")
-        pda_toggle_row.set_active(self.is_pdanet_proxy_active())
+        pda_toggle_row.set_active(is_pdanet_proxy_active())
         pda_toggle_row.connect("notify::active", self.on_pdanet_proxy_toggle)
         pda_group.add(pda_toggle_row)
         self.pda_toggle_row = pda_toggle_row
@@ -764,8 +3280,8 @@ done
         pda_redsocks_toggle = Adw.SwitchRow()
         pda_redsocks_toggle.set_title("Transparent Proxy (redsocks)")
         if self.is_redsocks_installed():
-            pda_redsocks_toggle.set_subtitle("All TCP traffic via iptables — captures every app")
-            pda_redsocks_toggle.set_active(self.is_redsocks_proxy_running())
+            pda_redsocks_toggle.set_subtitle(self.REDSOCKS_SUBTITLE)
+            pda_redsocks_toggle.set_active(is_redsocks_proxy_running())
         else:
             pda_redsocks_toggle.set_subtitle("redsocks missing — run ./install.sh to fix")
             pda_redsocks_toggle.set_sensitive(False)
@@ -774,279 +3290,205 @@ done
         self.pda_redsocks_toggle = pda_redsocks_toggle
 
         page.add(pda_group)
-        self.stack.add_titled(page, "wireless", "Wireless")
 
-    def is_bluetooth_powered(self):
-        """Check if Bluetooth adapter is powered on."""
-        try:
-            result = subprocess.run(
-                ["bluetoothctl", "show"],
-                capture_output=True, text=True, timeout=5
-            )
-            return "Powered: yes" in result.stdout
-        except:
-            return False
+        # Tethered traffic — live graph + top talkers while redsocks is active
+        self.flow_monitor = FlowMonitor()
+        self.traffic_timer_id = None
+
+        traffic_group = Adw.PreferencesGroup()
+        traffic_group.set_title("Tethered Traffic")
+        traffic_group.set_description("Throughput on the PDANet interface (last 60 s)")
+
+        self.traffic_graph = Gtk.DrawingArea()
+        self.traffic_graph.set_content_height(120)
+        self.traffic_graph.set_margin_top(6)
+        self.traffic_graph.set_margin_bottom(6)
+        self.traffic_graph.set_draw_func(self._draw_traffic_graph)
+        traffic_group.add(self.traffic_graph)
+
+        self.traffic_rate_row = Adw.ActionRow()
+        self.traffic_rate_row.set_title("Current")
+        traffic_group.add(self.traffic_rate_row)
+        page.add(traffic_group)
+
+        self.talker_groups = []
+        for title in ("Top Processes", "Top Destinations"):
+            group = Adw.PreferencesGroup()
+            group.set_title(title)
+            rows = []
+            for _ in range(5):
+                row = Adw.ActionRow()
+                rate = Gtk.Label()
+                rate.add_css_class("numeric")
+                row.add_suffix(rate)
+                row.set_visible(False)
+                group.add(row)
+                rows.append((row, rate))
+            page.add(group)
+            self.talker_groups.append((group, rows))
+        self.traffic_group = traffic_group
+
+        self._set_traffic_monitor(pda_redsocks_toggle.get_active())
+
+        self.stack.add_titled(page, "wireless", "Wireless")
 
     def on_bluetooth_power_toggle(self, row, _):
         """Toggle Bluetooth adapter power."""
         if self._initializing:
             return
         state = "on" if row.get_active() else "off"
-        subprocess.run(
-            ["bluetoothctl", "power", state],
-            capture_output=True, timeout=5
-        )
+        self.workers.submit(run_command, ["bluetoothctl", "power", state],
+                            resource="bluetooth", replace=True)
 
     def on_bluetooth_reset(self, button):
         """Full reset: adapter reset + scan + reconnect paired devices."""
         button.set_sensitive(False)
         button.set_label("Resetting...")
-        subprocess.Popen(
-            ["pkexec", os.path.expanduser("~/.local/bin/bt-reset")],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
+        self.root.call(
+            "BluetoothReset", None, [os.path.expanduser("~/.local/bin/bt-reset")],
+            on_line=self.bt_reset_row.set_subtitle,
+            on_done=lambda ok, output: self._bluetooth_reset_done(button),
         )
-        # Re-enable button and refresh state after sequence completes (~15s)
-        GLib.timeout_add(16000, self._bluetooth_reset_done, button)
 
     def _bluetooth_reset_done(self, button):
         button.set_sensitive(True)
         button.set_label("Reset")
+        self.bt_reset_row.set_subtitle("Reset adapter, scan, and reconnect devices")
         self._bluetooth_refresh_state()
-        return False
 
     def _bluetooth_refresh_state(self):
-        powered = self.is_bluetooth_powered()
-        self.bt_power_row.set_active(powered)
+        self.workers.submit(is_bluetooth_powered, resource="bluetooth",
+                            on_done=self._bluetooth_show_state)
         return False
 
+    def _bluetooth_show_state(self, powered, error):
+        self._show_state(self.bt_power_row, bool(powered))
+
     # === PDANET+ PROXY FUNCTIONS ===
     def is_redsocks_installed(self):
         """Check if redsocks is installed."""
-        try:
-            result = subprocess.run(["which", "redsocks"], capture_output=True)
-            return result.returncode == 0
-        except:
-            return False
+        return shutil.which("redsocks") is not None
 
 
-    def is_redsocks_proxy_running(self):
-        """Check if redsocks transparent proxy is active (no root needed)."""
-        try:
-            result = subprocess.run(
-                [os.path.expanduser("~/.local/bin/pdanet-proxy"), "status"],
-                capture_output=True, text=True, timeout=5
-            )
-            return "running" in result.stdout
-        except:
-            return False
+    REDSOCKS_SUBTITLE = "All TCP traffic via iptables — captures every app"
 
     def on_redsocks_proxy_toggle(self, row, _):
         """Start or stop the redsocks transparent proxy."""
         if self._initializing:
             return
         script = os.path.expanduser("~/.local/bin/pdanet-proxy")
-        if row.get_active():
-            self._redsocks_action = "start"
-            self._redsocks_proc = subprocess.Popen(
-                ["pkexec", script, "start"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-            )
-        else:
-            self._redsocks_action = "stop"
-            self._redsocks_proc = subprocess.Popen(
-                ["pkexec", script, "stop"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-            )
-        GLib.timeout_add(500, self._redsocks_poll, row)
-
-    def _redsocks_poll(self, row):
-        """Poll until pkexec process finishes, then verify."""
-        if hasattr(self, '_redsocks_proc') and self._redsocks_proc:
-            rc = self._redsocks_proc.poll()
-            if rc is None:
-                # Still running (user typing password) — check again in 500ms
-                return True
-
-            output = ""
-            try:
-                output = self._redsocks_proc.stdout.read().decode(errors='replace')
-            except Exception:
-                pass
-
-            running = self.is_redsocks_proxy_running()
-            wanted = self._redsocks_action == "start"
-
-            if running != wanted:
-                self._initializing = True
-                row.set_active(running)
-                self._initializing = False
-                msg = output.strip() if output.strip() else (
-                    "Could not start proxy. Is PDANet WiFi connected?"
-                    if wanted else "Could not stop proxy."
-                )
-                dialog = Adw.MessageDialog(
-                    transient_for=self.win,
-                    heading="Proxy Error",
-                    body=msg,
-                )
-                dialog.add_response("ok", "OK")
-                dialog.present()
-        return False
-
-    _PDANET_PROXY_HOST = "192.168.49.1"
-    _PDANET_PROXY_PORT = 8000
-    _PDANET_IGNORE_HOSTS = "['localhost', '127.0.0.0/8', '::1', '192.168.49.*']"
-    _PDANET_ENV_FILE = os.path.expanduser("~/.proxy_env")
+        wanted = row.get_active()
+        row.set_sensitive(False)
+        row.set_subtitle("Waiting for authorization…")
+        self.root.call(
+            "ProxyStart" if wanted else "ProxyStop", None,
+            [script, "start" if wanted else "stop"],
+            on_line=row.set_subtitle,
+            on_done=lambda ok, output: self._redsocks_done(row, wanted, output),
+        )
 
-    def is_pdanet_proxy_active(self):
-        """Check if GNOME system proxy is set to PDANet+."""
-        try:
-            result = subprocess.run(
-                ["gsettings", "get", "org.gnome.system.proxy", "mode"],
-                capture_output=True, text=True, timeout=5
+    def _redsocks_done(self, row, wanted, output):
+        """pdanet-proxy exited — sync the switch to the real state."""
+        running = is_redsocks_proxy_running()
+        row.set_sensitive(True)
+        row.set_subtitle(self.REDSOCKS_SUBTITLE)
+
+        if running != wanted:
+            self._initializing = True
+            row.set_active(running)
+            self._initializing = False
+            msg = output if output else (
+                "Could not start proxy. Is PDANet WiFi connected?"
+                if wanted else "Could not stop proxy."
             )
-            if "'manual'" not in result.stdout:
-                return False
-            result = subprocess.run(
-                ["gsettings", "get", "org.gnome.system.proxy.http", "host"],
-                capture_output=True, text=True, timeout=5
+            dialog = Adw.MessageDialog(
+                transient_for=self.win,
+                heading="Proxy Error",
+                body=msg,
             )
-            return self._PDANET_PROXY_HOST in result.stdout
-        except:
-            return False
+            dialog.add_response("ok", "OK")
+            dialog.present()
+        self._set_traffic_monitor(running)
+
+    # === TRAFFIC ACCOUNTING FUNCTIONS ===
+    def _set_traffic_monitor(self, active):
+        """Start or stop the 1s traffic sampler; groups are hidden while off."""
+        self.traffic_group.set_visible(active)
+        for group, _ in self.talker_groups:
+            group.set_visible(active)
+        if active and not self.traffic_timer_id:
+            self.flow_monitor.reset()
+            self.flow_monitor.tick()
+            self.traffic_timer_id = GLib.timeout_add_seconds(1, self._traffic_tick)
+        elif not active and self.traffic_timer_id:
+            GLib.source_remove(self.traffic_timer_id)
+            self.traffic_timer_id = None
+            self.flow_monitor.close()
+
+    def _traffic_tick(self):
+        mon = self.flow_monitor
+        mon.tick()
+        self.traffic_rate_row.set_subtitle(
+            f"↓ {format_bytes(mon.rx.last())}/s   ↑ {format_bytes(mon.tx.last())}/s"
+            if mon.iface else "PDANet interface not found"
+        )
+        self.traffic_graph.queue_draw()
+
+        # Rows are created once; only labels and visibility change per tick
+        for (_, rows), talkers in zip(self.talker_groups, (mon.processes, mon.destinations)):
+            top = mon.top(talkers, len(rows))
+            for i, (row, rate) in enumerate(rows):
+                if i >= len(top):
+                    row.set_visible(False)
+                    continue
+                t = top[i]
+                row.set_title(t.name)
+                row.set_subtitle(f"{t.connections} conn · {format_bytes(t.total)} total")
+                rate.set_label(f"{format_bytes(t.history.total / mon.HISTORY)}/s")
+                row.set_visible(True)
+        return True
+
+    def _draw_traffic_graph(self, area, cr, width, height):
+        mon = self.flow_monitor
+        rx = mon.rx.values()
+        tx = mon.tx.values()
+        peak = max(max(rx), max(tx), 1024)
+        step = width / (mon.HISTORY - 1)
+
+        cr.set_source_rgba(0.5, 0.5, 0.5, 0.25)
+        cr.set_line_width(1)
+        for frac in (0.25, 0.5, 0.75):
+            cr.move_to(0, height * frac)
+            cr.line_to(width, height * frac)
+        cr.stroke()
+
+        cr.set_line_width(2)
+        for series, rgb in ((rx, (0.21, 0.52, 0.89)), (tx, (0.90, 0.38, 0.0))):
+            cr.set_source_rgb(*rgb)
+            for i, v in enumerate(series):
+                y = height - (v / peak) * (height - 2) - 1
+                if i == 0:
+                    cr.move_to(0, y)
+                else:
+                    cr.line_to(i * step, y)
+            cr.stroke()
 
     def on_pdanet_proxy_toggle(self, row, _):
         """Toggle PDANet+ system proxy via GNOME gsettings."""
         if self._initializing:
             return
-        if row.get_active():
-            self._pdanet_proxy_enable()
-        else:
-            self._pdanet_proxy_disable()
-
-    def _pdanet_proxy_enable(self):
-        """Set GNOME system proxy + env vars for CLI tools."""
-        host = self._PDANET_PROXY_HOST
-        port = str(self._PDANET_PROXY_PORT)
-        proxy_url = f"http://{host}:{port}"
-
-        # 1. GNOME system proxy (browsers, GUI apps)
-        cmds = [
-            ["gsettings", "set", "org.gnome.system.proxy", "mode", "manual"],
-            ["gsettings", "set", "org.gnome.system.proxy.http", "host", host],
-            ["gsettings", "set", "org.gnome.system.proxy.http", "port", port],
-            ["gsettings", "set", "org.gnome.system.proxy.https", "host", host],
-            ["gsettings", "set", "org.gnome.system.proxy.https", "port", port],
-            ["gsettings", "set", "org.gnome.system.proxy", "ignore-hosts", self._PDANET_IGNORE_HOSTS],
-        ]
-        for cmd in cmds:
-            subprocess.run(cmd, capture_output=True, timeout=5)
-
-        # 2. Env var file sourced by shells (curl, wget, git, apt, pip, etc.)
-        no_proxy = "localhost,127.0.0.0/8,::1,192.168.49.*"
-        env_content = (
-            f'export http_proxy="{proxy_url}"\n'
-            f'export https_proxy="{proxy_url}"\n'
-            f'export HTTP_PROXY="{proxy_url}"\n'
-            f'export HTTPS_PROXY="{proxy_url}"\n'
-            f'export no_proxy="{no_proxy}"\n'
-            f'export NO_PROXY="{no_proxy}"\n'
+        enable = row.get_active()
+        self.workers.submit(
+            pdanet_proxy_enable if enable else pdanet_proxy_disable,
+            resource="pdanet-proxy", replace=True,
+            on_done=lambda result, error: pdanet_apt_proxy(self.root, enable),
         )
-        try:
-            with open(self._PDANET_ENV_FILE, "w") as f:
-                f.write(env_content)
-        except Exception:
-            pass
-
-        # Ensure bashrc sources the env file
-        self._ensure_bashrc_hook()
-
-        # 3. apt proxy (needs its own config)
-        apt_conf = f'Acquire::http::Proxy "{proxy_url}";\nAcquire::https::Proxy "{proxy_url}";\n'
-        try:
-            subprocess.run(
-                ["pkexec", "bash", "-c", f'echo \'{apt_conf}\' > /etc/apt/apt.conf.d/99pdanet-proxy'],
-                capture_output=True, timeout=10,
-            )
-        except Exception:
-            pass
-
-    def _pdanet_proxy_disable(self):
-        """Reset all proxy settings to defaults."""
-        # 1. GNOME system proxy
-        cmds = [
-            ["gsettings", "set", "org.gnome.system.proxy", "mode", "none"],
-            ["gsettings", "reset", "org.gnome.system.proxy.http", "host"],
-            ["gsettings", "reset", "org.gnome.system.proxy.http", "port"],
-            ["gsettings", "reset", "org.gnome.system.proxy.https", "host"],
-            ["gsettings", "reset", "org.gnome.system.proxy.https", "port"],
-            ["gsettings", "reset", "org.gnome.system.proxy", "ignore-hosts"],
-        ]
-        for cmd in cmds:
-            subprocess.run(cmd, capture_output=True, timeout=5)
-
-        # 2. Remove env var file
-        try:
-            os.remove(self._PDANET_ENV_FILE)
-        except FileNotFoundError:
-            pass
-
-        # 3. Remove apt proxy config
-        try:
-            subprocess.run(
-                ["pkexec", "rm", "-f", "/etc/apt/apt.conf.d/99pdanet-proxy"],
-                capture_output=True, timeout=10,
-            )
-        except Exception:
-            pass
-
-    def _ensure_bashrc_hook(self):
-        """Add proxy_env source line to ~/.bashrc if not already present."""
-        bashrc = os.path.expanduser("~/.bashrc")
-        hook = '[ -f ~/.proxy_env ] && . ~/.proxy_env'
-        try:
-            existing = ""
-            if os.path.exists(bashrc):
-                with open(bashrc, "r") as f:
-                    existing = f.read()
-            if hook not in existing:
-                with open(bashrc, "a") as f:
-                    f.write(f"\n# PDANet proxy env vars (managed by kysettings)\n{hook}\n")
-        except Exception:
-            pass
 
     def on_blank_changed(self, row, _):
         if self._initializing:
             return
         _, seconds = self.blank_options[row.get_selected()]
-        # Set GNOME idle-delay (controls when screen action triggers)
-        Gio.Settings.new("org.gnome.desktop.session").set_uint("idle-delay", seconds)
-        # Use DPMS to power off the monitor (not just blank)
-        self._set_monitor_off(seconds)
-
-    def _set_monitor_off(self, seconds):
-        """Configure DPMS to turn monitor OFF instead of just blanking."""
-        # Disable screensaver blanking — we want DPMS power off instead
-        subprocess.run(
-            ["gsettings", "set", "org.gnome.desktop.screensaver", "idle-activation-enabled", "false"],
-            capture_output=True, timeout=5
-        )
-        # Disable idle dimming
-        subprocess.run(
-            ["gsettings", "set", "org.gnome.settings-daemon.plugins.power", "idle-dim", "false"],
-            capture_output=True, timeout=5
-        )
-        if seconds == 0:
-            # "Never" — disable DPMS entirely
-            subprocess.run(["xset", "dpms", "0", "0", "0"], capture_output=True, timeout=5)
-            subprocess.run(["xset", "-dpms"], capture_output=True, timeout=5)
-        else:
-            # Set DPMS: no standby, no suspend, off after <seconds>
-            subprocess.run(["xset", "dpms", "0", "0", str(seconds)], capture_output=True, timeout=5)
-            subprocess.run(["xset", "+dpms"], capture_output=True, timeout=5)
+        self.display_power.reconcile(seconds)
 
     def add_keyboard_page(self):
         page = Adw.PreferencesPage()
@@ -1088,12 +3530,15 @@ done
         stt_install_row = Adw.ActionRow()
         stt_install_row.set_title("Speech Note")
         stt_install_row.set_subtitle("Offline speech-to-text engine (Flatpak)")
-        self.stt_install_btn = Gtk.Button(label="Installed" if self.is_speech_note_installed() else "Install")
+        self.stt_install_btn = Gtk.Button(label="Install")
         self.stt_install_btn.set_valign(Gtk.Align.CENTER)
-        self.stt_install_btn.set_sensitive(not self.is_speech_note_installed())
+        self.stt_install_btn.set_sensitive(False)
+        self.workers.submit(self.is_speech_note_installed,
+                            on_done=lambda installed, error: self._speech_note_show_installed(bool(installed)))
         self.stt_install_btn.connect("clicked", self.on_speech_note_install)
         stt_install_row.add_suffix(self.stt_install_btn)
         stt_group.add(stt_install_row)
+        self.stt_install_row = stt_install_row
 
         # Speech Lock install row
         sl_install_row = Adw.ActionRow()
@@ -1105,15 +3550,12 @@ done
         self.sl_install_btn.connect("clicked", self.on_speech_lock_install)
         sl_install_row.add_suffix(self.sl_install_btn)
         stt_group.add(sl_install_row)
+        self.sl_install_row = sl_install_row
 
         # Speech Lock run button
         sl_run_row = Adw.ActionRow()
         sl_run_row.set_title("Run Speech Lock")
-        sl_run_row.set_subtitle(
-            "Opens a terminal. Click target window, then dictate "
-            "in Speech Note (clipboard mode). Text auto-pastes into "
-            "the locked window. X11 only."
-        )
+        sl_run_row.set_subtitle(self.SPEECH_LOCK_SUBTITLE)
         self.sl_run_btn = Gtk.Button(label="Run")
         self.sl_run_btn.set_valign(Gtk.Align.CENTER)
         self.sl_run_btn.set_sensitive(self.is_speech_lock_installed())
@@ -1122,6 +3564,14 @@ done
         stt_group.add(sl_run_row)
         self.sl_run_row = sl_run_row
 
+        # Pick up a lock that's still running from an earlier session
+        self.speech_lock_unit = None
+        if self.supervisor:
+            running = self.supervisor.active_instances(SPEECH_LOCK_UNIT.format(""))
+            if running:
+                self.speech_lock_unit = running[0]
+                self.supervisor.watch(running[0], self._on_speech_lock_state)
+
         page.add(stt_group)
 
         self.stack.add_titled(page, "keyboard", "Keyboard")
@@ -1130,16 +3580,20 @@ done
         page = Adw.PreferencesPage()
         page.set_title("Timers")
 
-        # === ALARM ===
-        alarm_group = Adw.PreferencesGroup()
-        alarm_group.set_title("Alarm")
-        alarm_group.set_description("Set an alarm for a specific time")
+        # === ALARMS ===
+        self.alarm_group = Adw.PreferencesGroup()
+        self.alarm_group.set_title("Alarms")
+        self.alarm_group.set_description("Ring at a time of day, once or on repeat")
 
         # Time picker row
         alarm_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
         alarm_box.set_margin_top(10)
         alarm_box.set_margin_bottom(10)
 
+        self.alarm_name = Gtk.Entry(placeholder_text="Name")
+        self.alarm_name.set_hexpand(True)
+        alarm_box.append(self.alarm_name)
+
         self.alarm_hour = Gtk.SpinButton.new_with_range(0, 23, 1)
         self.alarm_hour.set_value(datetime.now().hour)
         self.alarm_hour.set_width_chars(2)
@@ -1154,27 +3608,29 @@ done
         alarm_box.append(Gtk.Label(label="Min:"))
         alarm_box.append(self.alarm_minute)
 
-        self.alarm_toggle = Gtk.ToggleButton(label="Set Alarm")
-        self.alarm_toggle.connect("toggled", self.on_alarm_toggle)
-        alarm_box.append(self.alarm_toggle)
+        self.alarm_repeat = Gtk.DropDown.new_from_strings(list(ALARM_REPEATS))
+        alarm_box.append(self.alarm_repeat)
 
-        self.alarm_status = Gtk.Label(label="No alarm set")
-        self.alarm_status.set_hexpand(True)
-        self.alarm_status.set_halign(Gtk.Align.END)
-        alarm_box.append(self.alarm_status)
+        alarm_add_btn = Gtk.Button(label="Add Alarm")
+        alarm_add_btn.connect("clicked", self.on_alarm_add)
+        alarm_box.append(alarm_add_btn)
 
-        alarm_group.add(alarm_box)
-        page.add(alarm_group)
+        self.alarm_group.add(alarm_box)
+        page.add(self.alarm_group)
 
-        # === COUNTDOWN TIMER ===
-        countdown_group = Adw.PreferencesGroup()
-        countdown_group.set_title("Countdown Timer")
-        countdown_group.set_description("Count down from a set duration")
+        # === COUNTDOWNS ===
+        self.countdown_group = Adw.PreferencesGroup()
+        self.countdown_group.set_title("Countdown Timers")
+        self.countdown_group.set_description("Count down from a set duration")
 
         countdown_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
         countdown_box.set_margin_top(10)
         countdown_box.set_margin_bottom(10)
 
+        self.countdown_name = Gtk.Entry(placeholder_text="Name")
+        self.countdown_name.set_hexpand(True)
+        countdown_box.append(self.countdown_name)
+
         self.countdown_hours = Gtk.SpinButton.new_with_range(0, 23, 1)
         self.countdown_hours.set_value(0)
         self.countdown_hours.set_width_chars(2)
@@ -1193,32 +3649,15 @@ done
         countdown_box.append(Gtk.Label(label="S:"))
         countdown_box.append(self.countdown_seconds)
 
-        countdown_group.add(countdown_box)
+        countdown_add_btn = Gtk.Button(label="Start")
+        countdown_add_btn.connect("clicked", self.on_countdown_add)
+        countdown_box.append(countdown_add_btn)
 
-        countdown_controls = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
-        countdown_controls.set_margin_bottom(10)
+        self.countdown_group.add(countdown_box)
+        page.add(self.countdown_group)
 
-        self.countdown_start_btn = Gtk.Button(label="Start")
-        self.countdown_start_btn.connect("clicked", self.on_countdown_start)
-        countdown_controls.append(self.countdown_start_btn)
-
-        self.countdown_stop_btn = Gtk.Button(label="Stop")
-        self.countdown_stop_btn.connect("clicked", self.on_countdown_stop)
-        self.countdown_stop_btn.set_sensitive(False)
-        countdown_controls.append(self.countdown_stop_btn)
-
-        self.countdown_reset_btn = Gtk.Button(label="Reset")
-        self.countdown_reset_btn.connect("clicked", self.on_countdown_reset)
-        countdown_controls.append(self.countdown_reset_btn)
-
-        self.countdown_display = Gtk.Label(label="00:00:00")
-        self.countdown_display.add_css_class("title-1")
-        self.countdown_display.set_hexpand(True)
-        self.countdown_display.set_halign(Gtk.Align.END)
-        countdown_controls.append(self.countdown_display)
-
-        countdown_group.add(countdown_controls)
-        page.add(countdown_group)
+        for timer in self.timers.timers:
+            self._add_timer_row(timer)
 
         # === STOPWATCH ===
         stopwatch_group = Adw.PreferencesGroup()
@@ -1238,6 +3677,11 @@ done
         self.stopwatch_stop_btn.set_sensitive(False)
         stopwatch_box.append(self.stopwatch_stop_btn)
 
+        self.stopwatch_lap_btn = Gtk.Button(label="Lap")
+        self.stopwatch_lap_btn.connect("clicked", self.on_stopwatch_lap)
+        self.stopwatch_lap_btn.set_sensitive(False)
+        stopwatch_box.append(self.stopwatch_lap_btn)
+
         self.stopwatch_reset_btn = Gtk.Button(label="Reset")
         self.stopwatch_reset_btn.connect("clicked", self.on_stopwatch_reset)
         stopwatch_box.append(self.stopwatch_reset_btn)
@@ -1247,129 +3691,227 @@ done
         self.stopwatch_display.set_hexpand(True)
         self.stopwatch_display.set_halign(Gtk.Align.END)
         stopwatch_box.append(self.stopwatch_display)
+        self.stopwatch_live = LiveLabel(self.stopwatch_display, self.render_stopwatch)
 
         stopwatch_group.add(stopwatch_box)
+
+        # Laps: a ListView only builds rows for what's on screen
+        self.lap_model = LapModel(self.stopwatch.laps)
+        lap_factory = Gtk.SignalListItemFactory()
+        lap_factory.connect("setup", self._on_lap_row_setup)
+        lap_factory.connect("bind", self._on_lap_row_bind)
+        lap_list = Gtk.ListView(model=Gtk.NoSelection.new(self.lap_model), factory=lap_factory)
+        self.lap_scroller = Gtk.ScrolledWindow(child=lap_list)
+        self.lap_scroller.set_min_content_height(180)
+        self.lap_scroller.set_visible(False)
+        stopwatch_group.add(self.lap_scroller)
+
+        self.lap_footer = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        self.lap_footer.set_margin_top(10)
+        self.lap_stats = Gtk.Label()
+        self.lap_stats.add_css_class("dim-label")
+        self.lap_stats.set_hexpand(True)
+        self.lap_stats.set_halign(Gtk.Align.START)
+        self.lap_footer.append(self.lap_stats)
+        self.lap_export_btn = Gtk.Button(label="Export CSV")
+        self.lap_export_btn.connect("clicked", self.on_laps_export)
+        self.lap_footer.append(self.lap_export_btn)
+        self.lap_footer.set_visible(False)
+        stopwatch_group.add(self.lap_footer)
         page.add(stopwatch_group)
 
         self.stack.add_titled(page, "timers", "Timers")
+        self._watch_resume()
 
-    # === ALARM FUNCTIONS ===
-    def on_alarm_toggle(self, button):
-        if button.get_active():
-            hour = int(self.alarm_hour.get_value())
-            minute = int(self.alarm_minute.get_value())
-            now = datetime.now()
-            self.alarm_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            if self.alarm_time <= now:
-                self.alarm_time += timedelta(days=1)
-
-            self.alarm_enabled = True
-            self.alarm_status.set_label(f"Alarm: {self.alarm_time.strftime('%H:%M')}")
-            button.set_label("Cancel")
-            self.alarm_timer_id = GLib.timeout_add(1000, self.check_alarm)
+    # === ALARM / COUNTDOWN FUNCTIONS ===
+    def _watch_resume(self):
+        """Resync the alarm when logind reports the machine has woken up."""
+        try:
+            bus = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+        except GLib.Error:
+            return
+        bus.signal_subscribe(
+            "org.freedesktop.login1", "org.freedesktop.login1.Manager", "PrepareForSleep",
+            "/org/freedesktop/login1", None, Gio.DBusSignalFlags.NONE, self._on_prepare_for_sleep,
+        )
+
+    def _on_prepare_for_sleep(self, conn, sender, path, iface, signal, params):
+        (going_down,) = params.unpack()
+        if not going_down:
+            self.timers.resync()
+
+    def on_alarm_add(self, button):
+        days = list(ALARM_REPEATS.values())[self.alarm_repeat.get_selected()]
+        alarm = Alarm(self.alarm_name.get_text().strip(), int(self.alarm_hour.get_value()),
+                      int(self.alarm_minute.get_value()), days)
+        self.alarm_name.set_text("")
+        self.timers.add(alarm)
+        self._add_timer_row(alarm)
+
+    def on_countdown_add(self, button):
+        h = int(self.countdown_hours.get_value())
+        m = int(self.countdown_minutes.get_value())
+        s = int(self.countdown_seconds.get_value())
+        duration = (h * 3600 + m * 60 + s) * USEC
+        if not duration:
+            return
+        countdown = Countdown(self.countdown_name.get_text().strip(), duration)
+        self.countdown_name.set_text("")
+        countdown.start()
+        self.timers.add(countdown)
+        self._add_timer_row(countdown)
+
+    def _add_timer_row(self, timer):
+        row = Adw.ActionRow()
+        delete_btn = Gtk.Button(icon_name="user-trash-symbolic")
+        delete_btn.set_valign(Gtk.Align.CENTER)
+        delete_btn.add_css_class("flat")
+        delete_btn.set_tooltip_text("Remove")
+        delete_btn.connect("clicked", lambda b: self._remove_timer(timer))
+
+        if isinstance(timer, Countdown):
+            row.set_title(GLib.markup_escape_text(timer.name or "Countdown"))
+            display = Gtk.Label()
+            display.add_css_class("title-3")
+            row.add_suffix(display)
+            # Round up so the display shows 00:00:01 until the final second is over
+            row.live = LiveLabel(display, lambda: format_duration(timer.remaining() + USEC - 1))
+
+            row.toggle_btn = Gtk.Button()
+            row.toggle_btn.set_valign(Gtk.Align.CENTER)
+            row.toggle_btn.connect("clicked", lambda b: self._toggle_countdown(timer))
+            row.add_suffix(row.toggle_btn)
+
+            reset_btn = Gtk.Button(label="Reset")
+            reset_btn.set_valign(Gtk.Align.CENTER)
+            reset_btn.connect("clicked", lambda b: self._reset_countdown(timer))
+            row.add_suffix(reset_btn)
+            self.countdown_group.add(row)
         else:
-            self.alarm_enabled = False
-            if self.alarm_timer_id:
-                GLib.source_remove(self.alarm_timer_id)
-                self.alarm_timer_id = None
-            self.alarm_status.set_label("No alarm set")
-            button.set_label("Set Alarm")
-
-    def check_alarm(self):
-        if not self.alarm_enabled:
-            return False
-        if datetime.now() >= self.alarm_time:
-            self.trigger_alarm()
-            self.alarm_toggle.set_active(False)
-            return False
-        return True
+            row.set_title(GLib.markup_escape_text(timer.name or "Alarm"))
+            self.alarm_group.add(row)
 
-    def trigger_alarm(self):
-        """Play alarm sound and show notification."""
-        subprocess.Popen(["pw-play", "/usr/share/sounds/freedesktop/stereo/alarm-clock-elapsed.oga"])
-        subprocess.Popen(["notify-send", "-u", "critical", "Alarm", "Time's up!"])
-
-    # === COUNTDOWN FUNCTIONS ===
-    def on_countdown_start(self, button):
-        if not self.countdown_running:
-            if self.countdown_remaining.total_seconds() == 0:
-                h = int(self.countdown_hours.get_value())
-                m = int(self.countdown_minutes.get_value())
-                s = int(self.countdown_seconds.get_value())
-                self.countdown_remaining = timedelta(hours=h, minutes=m, seconds=s)
-
-            if self.countdown_remaining.total_seconds() > 0:
-                self.countdown_running = True
-                self.countdown_start_btn.set_sensitive(False)
-                self.countdown_stop_btn.set_sensitive(True)
-                self.countdown_timer_id = GLib.timeout_add(100, self.update_countdown)
-
-    def on_countdown_stop(self, button):
-        self.countdown_running = False
-        if self.countdown_timer_id:
-            GLib.source_remove(self.countdown_timer_id)
-            self.countdown_timer_id = None
-        self.countdown_start_btn.set_sensitive(True)
-        self.countdown_stop_btn.set_sensitive(False)
-
-    def on_countdown_reset(self, button):
-        self.on_countdown_stop(button)
-        self.countdown_remaining = timedelta()
-        self.countdown_display.set_label("00:00:00")
-
-    def update_countdown(self):
-        if not self.countdown_running:
-            return False
+        row.add_suffix(delete_btn)
+        self.timer_rows[timer] = row
+        self._refresh_timer_row(timer)
 
-        self.countdown_remaining -= timedelta(milliseconds=100)
-        if self.countdown_remaining.total_seconds() <= 0:
-            self.countdown_remaining = timedelta()
-            self.countdown_display.set_label("00:00:00")
-            self.on_countdown_stop(None)
-            self.trigger_alarm()
-            return False
+    def _refresh_timer_row(self, timer):
+        row = self.timer_rows.get(timer)
+        if row is None:
+            return
+        if isinstance(timer, Countdown):
+            row.toggle_btn.set_label("Pause" if timer.running else "Start")
+            row.live.set_active(timer.running)
+        else:
+            row.set_subtitle(timer.describe())
 
-        total = int(self.countdown_remaining.total_seconds())
-        h, rem = divmod(total, 3600)
-        m, s = divmod(rem, 60)
-        self.countdown_display.set_label(f"{h:02d}:{m:02d}:{s:02d}")
-        return True
+    def _toggle_countdown(self, timer):
+        if timer.running:
+            timer.stop()
+        else:
+            timer.start()
+        self.timers.update(timer)
+        self._refresh_timer_row(timer)
+
+    def _reset_countdown(self, timer):
+        timer.reset()
+        self.timers.update(timer)
+        self._refresh_timer_row(timer)
+
+    def _remove_timer(self, timer):
+        self.timers.remove(timer)
+        row = self.timer_rows.pop(timer)
+        (self.countdown_group if isinstance(timer, Countdown) else self.alarm_group).remove(row)
+
+    def on_timer_fired(self, timer):
+        if timer in self.timer_rows:
+            if timer in self.timers.timers:
+                self._refresh_timer_row(timer)
+            else:
+                # One-shot alarms are done once they've rung
+                self.alarm_group.remove(self.timer_rows.pop(timer))
+        if self.timers.units is None:
+            self.trigger_alarm(timer.title)  # no systemd timer to ring it for us
+
+    def trigger_alarm(self, title="Alarm"):
+        """Play alarm sound and show notification."""
+        spawn_command(alarm_command(title))
 
     # === STOPWATCH FUNCTIONS ===
     def on_stopwatch_start(self, button):
-        if not self.stopwatch_running:
-            self.stopwatch_running = True
-            self.stopwatch_start = datetime.now()
+        if not self.stopwatch.running:
+            self.stopwatch.start()
             self.stopwatch_start_btn.set_sensitive(False)
             self.stopwatch_stop_btn.set_sensitive(True)
-            self.stopwatch_timer_id = GLib.timeout_add(100, self.update_stopwatch)
+            self.stopwatch_lap_btn.set_sensitive(True)
+            self.stopwatch_live.set_active(True)
 
     def on_stopwatch_stop(self, button):
-        if self.stopwatch_running:
-            self.stopwatch_running = False
-            self.stopwatch_elapsed += datetime.now() - self.stopwatch_start
-            if self.stopwatch_timer_id:
-                GLib.source_remove(self.stopwatch_timer_id)
-                self.stopwatch_timer_id = None
+        if self.stopwatch.running:
+            self.stopwatch.stop()
+            self.stopwatch_live.set_active(False)
             self.stopwatch_start_btn.set_sensitive(True)
             self.stopwatch_stop_btn.set_sensitive(False)
+            self.stopwatch_lap_btn.set_sensitive(False)
 
     def on_stopwatch_reset(self, button):
         self.on_stopwatch_stop(button)
-        self.stopwatch_elapsed = timedelta()
+        count = len(self.stopwatch.laps)
+        self.stopwatch.reset()
+        self.lap_model.items_changed(0, count, 0)
+        self._update_lap_stats()
         self.stopwatch_display.set_label("00:00:00.0")
 
-    def update_stopwatch(self):
-        if not self.stopwatch_running:
-            return False
+    def on_stopwatch_lap(self, button):
+        self.stopwatch.lap()
+        self.lap_model.items_changed(0, 0, 1)
+        self._update_lap_stats()
+
+    def _update_lap_stats(self):
+        laps = self.stopwatch.laps
+        self.lap_scroller.set_visible(len(laps) > 0)
+        self.lap_footer.set_visible(len(laps) > 0)
+        if laps:
+            self.lap_stats.set_label(
+                f"Best {format_duration(laps.best, tenths=True)}  ·  "
+                f"Average {format_duration(int(laps.mean), tenths=True)}  ·  "
+                f"Std dev {laps.stddev() / USEC:.2f}s"
+            )
 
-        elapsed = self.stopwatch_elapsed + (datetime.now() - self.stopwatch_start)
-        total = elapsed.total_seconds()
-        h, rem = divmod(int(total), 3600)
-        m, s = divmod(rem, 60)
-        tenths = int((total - int(total)) * 10)
-        self.stopwatch_display.set_label(f"{h:02d}:{m:02d}:{s:02d}.{tenths}")
-        return True
+    def _on_lap_row_setup(self, factory, item):
+        box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        box.set_margin_start(12)
+        box.set_margin_end(12)
+        for xalign in (0, 1, 1):
+            label = Gtk.Label(xalign=xalign)
+            label.set_hexpand(True)
+            label.add_css_class("numeric")
+            box.append(label)
+        item.set_child(box)
+
+    def _on_lap_row_bind(self, factory, item):
+        label = item.get_child().get_first_child()
+        for text in item.get_item().get_string().split("\t"):
+            label.set_label(text)
+            label = label.get_next_sibling()
+
+    def on_laps_export(self, button):
+        dialog = Gtk.FileDialog(initial_name="laps.csv")
+        dialog.save(self.win, None, self._on_laps_export_done)
+
+    def _on_laps_export_done(self, dialog, result):
+        try:
+            path = dialog.save_finish(result).get_path()
+        except GLib.Error:
+            return  # cancelled
+        try:
+            with open(path, "w") as f:
+                f.write(self.stopwatch.laps.to_csv())
+        except OSError as e:
+            print(f"Could not export laps: {e}")
+
+    def render_stopwatch(self):
+        return format_duration(self.stopwatch.elapsed(), tenths=True)
 
     def get_custom_keybindings(self):
         """Get list of custom keybinding paths."""
@@ -1455,27 +3997,28 @@ done
     def is_speech_note_installed(self):
         """Check if Speech Note is installed via Flatpak."""
         try:
-            result = subprocess.run(
-                ["flatpak", "list", "--app", "--columns=application"],
-                capture_output=True, text=True, timeout=5
-            )
+            result = run_command(["flatpak", "list", "--app", "--columns=application"])
             return "net.mkiol.SpeechNote" in result.stdout
         except:
             return False
 
+    def _speech_note_show_installed(self, installed):
+        self.stt_install_btn.set_label("Installed" if installed else "Install")
+        self.stt_install_btn.set_sensitive(not installed)
+
     def on_speech_note_install(self, button):
         """Install Speech Note via Flatpak."""
         button.set_sensitive(False)
         button.set_label("Installing...")
-        subprocess.Popen(
-            ["flatpak", "install", "-y", "flathub", "net.mkiol.SpeechNote"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
+        self.installs.run(
+            ["flatpak", "install", "-y", "--noninteractive", "flathub", "net.mkiol.SpeechNote"],
+            on_line=lambda line: self.stt_install_row.set_subtitle(line[:80]),
+            on_done=lambda ok, output: self._speech_note_install_done(ok),
         )
-        GLib.timeout_add(30000, self._speech_note_install_done)
 
-    def _speech_note_install_done(self):
-        if self.is_speech_note_installed():
+    def _speech_note_install_done(self, ok):
+        self.stt_install_row.set_subtitle("Offline speech-to-text engine (Flatpak)")
+        if ok:
             self.stt_install_btn.set_label("Installed")
         else:
             self.stt_install_btn.set_label("Install")
@@ -1486,7 +4029,8 @@ done
     def is_speech_lock_installed(self):
         """Check if speech-lock script and deps are installed."""
         script = os.path.expanduser("~/.local/bin/speech-lock")
-        return os.path.exists(script)
+        return (os.path.exists(script)
+                and os.path.exists(os.path.expanduser("~/.local/bin/kyx11.py")))
 
     def on_speech_lock_install(self, button):
         """Install speech-lock script and dependencies (xdotool, xclip)."""
@@ -1494,30 +4038,20 @@ done
         button.set_label("Installing...")
 
         # Install xdotool and xclip if missing
-        deps_needed = []
-        for cmd in ["xdotool", "xclip"]:
-            if subprocess.run(["which", cmd], capture_output=True).returncode != 0:
-                deps_needed.append(cmd)
-        if deps_needed:
-            subprocess.Popen(
-                ["pkexec", "apt", "install", "-y"] + deps_needed,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
+        deps_needed = [cmd for cmd in ["xdotool", "xclip"] if not shutil.which(cmd)]
 
-        # Copy the script
-        script_src = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts", "speech-lock")
-        script_dst = os.path.expanduser("~/.local/bin/speech-lock")
-        os.makedirs(os.path.dirname(script_dst), exist_ok=True)
+        # Copy the script and its X11 helper module
+        self._copy_helper_script("kyx11.py")
+        self._copy_helper_script("speech-lock")
 
-        if os.path.exists(script_src):
-            import shutil
-            shutil.copy2(script_src, script_dst)
-            os.chmod(script_dst, 0o755)
-
-        GLib.timeout_add(5000, self._speech_lock_install_done)
+        self.installs.apt(
+            deps_needed,
+            on_line=lambda line: self.sl_install_row.set_subtitle(line[:80]),
+            on_done=lambda ok, output: self._speech_lock_install_done(),
+        )
 
     def _speech_lock_install_done(self):
+        self.sl_install_row.set_subtitle("Locks dictation to one window (requires xdotool, xclip)")
         if self.is_speech_lock_installed():
             self.sl_install_btn.set_label("Installed")
             self.sl_run_btn.set_sensitive(True)
@@ -1526,13 +4060,146 @@ done
             self.sl_install_btn.set_sensitive(True)
         return False
 
+    SPEECH_LOCK_SUBTITLE = (
+        "Click the target window, then dictate in Speech Note "
+        "(clipboard mode). Text auto-pastes into the locked window. X11 only."
+    )
+
     def on_speech_lock_run(self, button):
-        """Launch speech-lock in a terminal window."""
+        """Pick a window, then run speech-lock for it as a supervised unit."""
         script = os.path.expanduser("~/.local/bin/speech-lock")
-        subprocess.Popen(
-            ["gnome-terminal", "--title=Speech Lock", "--", "python3", script],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
+        if self.supervisor is None:
+            # No systemd user manager — fall back to an unsupervised terminal
+            spawn_command(
+                ["gnome-terminal", "--title=Speech Lock", "--", "python3", script],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            return
+        if self.speech_lock_unit and self.supervisor.is_active(self.speech_lock_unit):
+            self.supervisor.stop(self.speech_lock_unit)
+            return
+        button.set_sensitive(False)
+        self.sl_run_row.set_subtitle("Click the window to lock dictation to…")
+        AsyncProcess(["xdotool", "selectwindow"], on_done=self._speech_lock_selected)
+
+    def _speech_lock_selected(self, ok, output):
+        self.sl_run_btn.set_sensitive(True)
+        wid = output.split()[-1] if ok and output else ""
+        if not wid.isdigit():
+            self.sl_run_row.set_subtitle(self.SPEECH_LOCK_SUBTITLE)
+            return
+        if self.speech_lock_unit:
+            self.supervisor.stop(self.speech_lock_unit)
+        self.speech_lock_unit = SPEECH_LOCK_UNIT.format(wid)
+        self.supervisor.watch(self.speech_lock_unit, self._on_speech_lock_state)
+        self.supervisor.start(self.speech_lock_unit)
+
+    def _on_speech_lock_state(self, unit, active, sub):
+        if unit != self.speech_lock_unit:
+            return
+        running = self.supervisor.is_active(unit) or sub == "auto-restart"
+        self.sl_run_btn.set_label("Stop" if running else "Run")
+        if sub == "auto-restart":
+            self.sl_run_row.set_subtitle("Speech Lock crashed — restarting…")
+        elif running:
+            wid = unit.split("@", 1)[1].split(".", 1)[0]
+            self.sl_run_row.set_subtitle(f"Locked to window {wid} — dictate in Speech Note")
+        else:
+            self.sl_run_row.set_subtitle(self.SPEECH_LOCK_SUBTITLE)
+
+    # === DIAGNOSTICS PAGE ===
+    def add_diagnostics_page(self):
+        page = Adw.PreferencesPage()
+        page.set_title("Diagnostics")
+
+        summary_group = Adw.PreferencesGroup()
+        summary_group.set_title("External Commands")
+        summary_group.set_description(f"The last {TRACE_SIZE} commands this session ran")
+        buttons = Gtk.Box(spacing=6)
+        refresh_btn = Gtk.Button.new_from_icon_name("view-refresh-symbolic")
+        refresh_btn.set_tooltip_text("Refresh")
+        refresh_btn.add_css_class("flat")
+        refresh_btn.connect("clicked", lambda b: self.refresh_diagnostics())
+        buttons.append(refresh_btn)
+        export_btn = Gtk.Button(label="Export JSON")
+        export_btn.add_css_class("flat")
+        export_btn.connect("clicked", self.on_diagnostics_export)
+        buttons.append(export_btn)
+        summary_group.set_header_suffix(buttons)
+        self.trace_summary_row = Adw.ActionRow()
+        summary_group.add(self.trace_summary_row)
+        page.add(summary_group)
+
+        self.slowest_group = Adw.PreferencesGroup()
+        self.slowest_group.set_title("Slowest")
+        self.slowest_group.set_description("By longest single call")
+        page.add(self.slowest_group)
+
+        self.failing_group = Adw.PreferencesGroup()
+        self.failing_group.set_title("Most Failing")
+        self.failing_group.set_description("Non-zero exits and timeouts")
+        page.add(self.failing_group)
+
+        if self.watchdog:
+            self.stalls_group = Adw.PreferencesGroup()
+            self.stalls_group.set_title("Main-Loop Stalls")
+            self.stalls_group.set_description(
+                f"Handlers that blocked the UI for over {self.watchdog.threshold * 1000:.0f} ms")
+            page.add(self.stalls_group)
+        self.diagnostics_rows = []
+
+        # Rebuilt whenever the page is shown, not on every recorded call
+        page.connect("map", lambda w: self.refresh_diagnostics())
+        self.stack.add_titled(page, "diagnostics", "Diagnostics")
+
+    def refresh_diagnostics(self):
+        for group, row in self.diagnostics_rows:
+            group.remove(row)
+        self.diagnostics_rows = []
+
+        calls = list(TRACE.calls)
+        failed = sum(1 for c in calls if TRACE.failed(c))
+        timeouts = sum(1 for c in calls if c["timeout"])
+        self.trace_summary_row.set_title(f"{len(calls)} calls, {failed} failed, {timeouts} timed out")
+        self.trace_summary_row.set_subtitle(
+            f"{sum(c['ms'] for c in calls) / 1000:.1f} s spent waiting on commands")
+
+        def add(group, title, subtitle):
+            row = Adw.ActionRow(title=GLib.markup_escape_text(title),
+                                subtitle=GLib.markup_escape_text(subtitle))
+            row.set_subtitle_lines(2)
+            group.add(row)
+            self.diagnostics_rows.append((group, row))
+
+        for s in TRACE.slowest():
+            add(self.slowest_group, s["command"],
+                f"max {s['max_ms']:.0f} ms · avg {s['avg_ms']:.0f} ms · {s['calls']} calls")
+        for s in TRACE.most_failing():
+            add(self.failing_group, s["command"],
+                f"{s['failures']}/{s['calls']} failed — {s['last_error']}")
+        if not TRACE.most_failing(1):
+            add(self.failing_group, "No failures", "")
+        if self.watchdog:
+            for s in self.watchdog.worst():
+                add(self.stalls_group, s["handler"],
+                    f"{s['count']}× · total {s['total_ms']:.0f} ms · max {s['max_ms']:.0f} ms — {s['where']}")
+
+    def on_diagnostics_export(self, button):
+        dialog = Gtk.FileDialog(initial_name="kysettings-commands.json")
+        dialog.save(self.win, None, self._on_diagnostics_export_done)
+
+    def _on_diagnostics_export_done(self, dialog, result):
+        try:
+            path = dialog.save_finish(result).get_path()
+        except GLib.Error:
+            return  # cancelled
+        try:
+            with open(path, "w") as f:
+                f.write(TRACE.to_json())
+        except OSError as e:
+            print(f"Could not export diagnostics: {e}")
+
 
-KySettings().run(None)
+if __name__ == "__main__":
+    KySettings().run(sys.argv)
@@ -0,0 +1,572 @@
+"""Minimal ctypes bindings to libX11 shared by the kysettings helper scripts.
+
+Installed next to the scripts in ~/.local/bin so they can `import kyx11`.
+Only what the helpers need is bound: one persistent connection, property
+reads, blocking event delivery, XFixes clipboard notifications, clipboard
+ownership and XTest key injection. X11 only.
+"""
+
+import collections
+import ctypes
+import ctypes.util
+import select
+import time
+
+_xlib = ctypes.cdll.LoadLibrary(ctypes.util.find_library("X11") or "libX11.so.6")
+try:
+    _xfixes = ctypes.cdll.LoadLibrary(ctypes.util.find_library("Xfixes") or "libXfixes.so.3")
+except OSError:
+    _xfixes = None
+try:
+    _xtst = ctypes.cdll.LoadLibrary(ctypes.util.find_library("Xtst") or "libXtst.so.6")
+except OSError:
+    _xtst = None
+
+Window = ctypes.c_ulong
+Atom = ctypes.c_ulong
+Time = ctypes.c_ulong
+
+# X.h constants
+AnyPropertyType = 0
+CurrentTime = 0
+Success = 0
+PropModeReplace = 0
+XA_ATOM = 4
+KeyPress = 2
+KeyRelease = 3
+FocusIn = 9
+DestroyNotify = 17
+PropertyNotify = 28
+SelectionClear = 29
+SelectionRequest = 30
+SelectionNotify = 31
+ClientMessage = 33
+NoEventMask = 0
+KeyPressMask = 1 << 0
+KeyReleaseMask = 1 << 1
+StructureNotifyMask = 1 << 17
+SubstructureNotifyMask = 1 << 19
+SubstructureRedirectMask = 1 << 20
+FocusChangeMask = 1 << 21
+PropertyChangeMask = 1 << 22
+ShiftMask = 1 << 0
+ControlMask = 1 << 2
+Mod1Mask = 1 << 3
+Mod4Mask = 1 << 6
+
+# name -> (keysym name, state bit) for "ctrl+shift+v" style combos
+MODIFIERS = {
+    "ctrl": ("Control_L", ControlMask),
+    "shift": ("Shift_L", ShiftMask),
+    "alt": ("Alt_L", Mod1Mask),
+    "super": ("Super_L", Mod4Mask),
+}
+
+# Xfixes.h
+XFixesSetSelectionOwnerNotify = 0
+XFixesSelectionNotify = 0
+XFixesSetSelectionOwnerNotifyMask = 1
+
+
+class XAnyEvent(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_int), ("serial", ctypes.c_ulong),
+                ("send_event", ctypes.c_int), ("display", ctypes.c_void_p),
+                ("window", Window)]
+
+
+class XPropertyEvent(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_int), ("serial", ctypes.c_ulong),
+                ("send_event", ctypes.c_int), ("display", ctypes.c_void_p),
+                ("window", Window), ("atom", Atom), ("time", Time),
+                ("state", ctypes.c_int)]
+
+
+class XDestroyWindowEvent(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_int), ("serial", ctypes.c_ulong),
+                ("send_event", ctypes.c_int), ("display", ctypes.c_void_p),
+                ("event", Window), ("window", Window)]
+
+
+class XKeyEvent(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_int), ("serial", ctypes.c_ulong),
+                ("send_event", ctypes.c_int), ("display", ctypes.c_void_p),
+                ("window", Window), ("root", Window), ("subwindow", Window), ("time", Time),
+                ("x", ctypes.c_int), ("y", ctypes.c_int),
+                ("x_root", ctypes.c_int), ("y_root", ctypes.c_int),
+                ("state", ctypes.c_uint), ("keycode", ctypes.c_uint),
+                ("same_screen", ctypes.c_int)]
+
+
+class XFocusChangeEvent(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_int), ("serial", ctypes.c_ulong),
+                ("send_event", ctypes.c_int), ("display", ctypes.c_void_p),
+                ("window", Window), ("mode", ctypes.c_int), ("detail", ctypes.c_int)]
+
+
+class XSelectionRequestEvent(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_int), ("serial", ctypes.c_ulong),
+                ("send_event", ctypes.c_int), ("display", ctypes.c_void_p),
+                ("owner", Window), ("requestor", Window), ("selection", Atom),
+                ("target", Atom), ("property", Atom), ("time", Time)]
+
+
+class XSelectionClearEvent(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_int), ("serial", ctypes.c_ulong),
+                ("send_event", ctypes.c_int), ("display", ctypes.c_void_p),
+                ("window", Window), ("selection", Atom), ("time", Time)]
+
+
+class XClientMessageEvent(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_int), ("serial", ctypes.c_ulong),
+                ("send_event", ctypes.c_int), ("display", ctypes.c_void_p),
+                ("window", Window), ("message_type", Atom), ("format", ctypes.c_int),
+                ("data", ctypes.c_long * 5)]
+
+
+class XSelectionEvent(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_int), ("serial", ctypes.c_ulong),
+                ("send_event", ctypes.c_int), ("display", ctypes.c_void_p),
+                ("requestor", Window), ("selection", Atom), ("target", Atom),
+                ("property", Atom), ("time", Time)]
+
+
+class XFixesSelectionNotifyEvent(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_int), ("serial", ctypes.c_ulong),
+                ("send_event", ctypes.c_int), ("display", ctypes.c_void_p),
+                ("window", Window), ("subtype", ctypes.c_int), ("owner", Window),
+                ("selection", Atom), ("timestamp", Time), ("selection_timestamp", Time)]
+
+
+class XEvent(ctypes.Union):
+    _fields_ = [("type", ctypes.c_int), ("xany", XAnyEvent),
+                ("xproperty", XPropertyEvent), ("xdestroywindow", XDestroyWindowEvent),
+                ("xkey", XKeyEvent), ("xfocus", XFocusChangeEvent),
+                ("xselectionrequest", XSelectionRequestEvent),
+                ("xselectionclear", XSelectionClearEvent), ("xclient", XClientMessageEvent),
+                ("xselection", XSelectionEvent), ("xfixesselection", XFixesSelectionNotifyEvent),
+                ("pad", ctypes.c_long * 24)]
+
+
+class XClassHint(ctypes.Structure):
+    _fields_ = [("res_name", ctypes.c_char_p), ("res_class", ctypes.c_char_p)]
+
+
+_xlib.XOpenDisplay.restype = ctypes.c_void_p
+_xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+_xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+_xlib.XDefaultRootWindow.restype = Window
+_xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+_xlib.XConnectionNumber.argtypes = [ctypes.c_void_p]
+_xlib.XInternAtom.restype = Atom
+_xlib.XInternAtom.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
+_xlib.XSelectInput.argtypes = [ctypes.c_void_p, Window, ctypes.c_long]
+_xlib.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.POINTER(XEvent)]
+_xlib.XPending.argtypes = [ctypes.c_void_p]
+_xlib.XFlush.argtypes = [ctypes.c_void_p]
+_xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+_xlib.XFree.argtypes = [ctypes.c_void_p]
+_xlib.XGetClassHint.argtypes = [ctypes.c_void_p, Window, ctypes.POINTER(XClassHint)]
+_xlib.XCreateSimpleWindow.restype = Window
+_xlib.XCreateSimpleWindow.argtypes = [
+    ctypes.c_void_p, Window, ctypes.c_int, ctypes.c_int, ctypes.c_uint, ctypes.c_uint,
+    ctypes.c_uint, ctypes.c_ulong, ctypes.c_ulong,
+]
+_xlib.XDestroyWindow.argtypes = [ctypes.c_void_p, Window]
+_xlib.XConvertSelection.argtypes = [ctypes.c_void_p, Atom, Atom, Atom, Window, Time]
+_xlib.XSetSelectionOwner.argtypes = [ctypes.c_void_p, Atom, Window, Time]
+_xlib.XGetSelectionOwner.restype = Window
+_xlib.XGetSelectionOwner.argtypes = [ctypes.c_void_p, Atom]
+_xlib.XChangeProperty.argtypes = [
+    ctypes.c_void_p, Window, Atom, Atom, ctypes.c_int, ctypes.c_int, ctypes.c_void_p, ctypes.c_int,
+]
+_xlib.XSendEvent.argtypes = [ctypes.c_void_p, Window, ctypes.c_int, ctypes.c_long,
+                             ctypes.POINTER(XEvent)]
+_xlib.XStringToKeysym.restype = ctypes.c_ulong
+_xlib.XStringToKeysym.argtypes = [ctypes.c_char_p]
+_xlib.XKeysymToKeycode.restype = ctypes.c_ubyte
+_xlib.XKeysymToKeycode.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+_xlib.XGetWindowProperty.argtypes = [
+    ctypes.c_void_p, Window, Atom, ctypes.c_long, ctypes.c_long, ctypes.c_int, Atom,
+    ctypes.POINTER(Atom), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_ulong),
+    ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_void_p),
+]
+
+if _xfixes:
+    _xfixes.XFixesQueryExtension.argtypes = [
+        ctypes.c_void_p, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
+    _xfixes.XFixesSelectSelectionInput.argtypes = [
+        ctypes.c_void_p, Window, Atom, ctypes.c_ulong]
+if _xtst:
+    _xtst.XTestFakeKeyEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+
+# The default Xlib error handler exits the process; windows vanish between
+# an event and our property read all the time, so just ignore errors.
+_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+_ignore_errors = _ERROR_HANDLER(lambda dpy, err: 0)
+_xlib.XSetErrorHandler(_ignore_errors)
+
+
+class Display:
+    """One persistent X connection."""
+
+    def __init__(self):
+        self.dpy = _xlib.XOpenDisplay(None)
+        if not self.dpy:
+            raise RuntimeError("Cannot open X display (X11 only — is DISPLAY set?)")
+        self.root = _xlib.XDefaultRootWindow(self.dpy)
+        self.xlib = _xlib
+        self._atoms = {}
+        self._keycodes = {}
+        self.backlog = collections.deque()  # events set aside while waiting for a reply
+        # Callables that may consume an event (return True) before wait_event()
+        # hands it out — e.g. serving clipboard requests wherever we block.
+        self.filters = []
+
+    def close(self):
+        if self.dpy:
+            _xlib.XCloseDisplay(self.dpy)
+            self.dpy = None
+
+    def fileno(self):
+        return _xlib.XConnectionNumber(self.dpy)
+
+    def atom(self, name):
+        atom = self._atoms.get(name)
+        if atom is None:
+            atom = self._atoms[name] = _xlib.XInternAtom(self.dpy, name.encode(), 0)
+        return atom
+
+    def flush(self):
+        _xlib.XFlush(self.dpy)
+
+    def select_input(self, window, mask):
+        _xlib.XSelectInput(self.dpy, window, mask)
+        _xlib.XFlush(self.dpy)
+
+    def pending(self):
+        return len(self.backlog) or _xlib.XPending(self.dpy)
+
+    def next_event(self):
+        if self.backlog:
+            return self.backlog.popleft()
+        ev = XEvent()
+        _xlib.XNextEvent(self.dpy, ctypes.byref(ev))
+        return ev
+
+    def _take(self):
+        """Next queued event that no filter consumed, or None if the queue is empty."""
+        if self.backlog:
+            return self.backlog.popleft()  # already went through the filters
+        while _xlib.XPending(self.dpy):
+            ev = XEvent()
+            _xlib.XNextEvent(self.dpy, ctypes.byref(ev))
+            if not any(f(ev) for f in self.filters):
+                return ev
+        return None
+
+    def wait_event(self, timeout=None):
+        """Block in select() (so signals still get through) until an event arrives.
+
+        Returns the event, or None if timeout seconds pass first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            ev = self._take()
+            if ev is not None:
+                return ev
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            select.select([self], [], [], remaining)
+
+    def wait_for(self, match, timeout):
+        """Wait up to timeout seconds for an event where match(ev) is true.
+
+        Everything else that arrives meanwhile is kept, in order, for the
+        next wait_event() call. Returns the matching event or None.
+        """
+        deadline = time.monotonic() + timeout
+        set_aside = []
+        try:
+            while True:
+                ev = self.wait_event(max(0, deadline - time.monotonic()))
+                if ev is None or match(ev):
+                    return ev
+                set_aside.append(ev)
+        finally:
+            self.backlog.extendleft(reversed(set_aside))
+
+    def get_property(self, window, name, req_type=AnyPropertyType, max_longs=4096):
+        """Return (format, raw bytes or list of ints), or (0, None) if unset."""
+        _, fmt, value = self.get_property_typed(window, name, req_type, max_longs)
+        return fmt, value
+
+    def get_property_typed(self, window, name, req_type=AnyPropertyType, max_longs=4096,
+                           delete=False):
+        """Like get_property, but returns (type atom, format, value)."""
+        actual_type = Atom()
+        actual_format = ctypes.c_int()
+        nitems = ctypes.c_ulong()
+        after = ctypes.c_ulong()
+        data = ctypes.c_void_p()
+        status = _xlib.XGetWindowProperty(
+            self.dpy, window, self.atom(name), 0, max_longs, int(delete), req_type,
+            ctypes.byref(actual_type), ctypes.byref(actual_format), ctypes.byref(nitems),
+            ctypes.byref(after), ctypes.byref(data),
+        )
+        if status != Success or not data.value:
+            return actual_type.value, 0, None
+        try:
+            fmt, n = actual_format.value, nitems.value
+            if fmt == 32:
+                # Format-32 data is handed back as an array of C longs
+                value = list((ctypes.c_ulong * n).from_address(data.value))
+            elif fmt == 16:
+                value = list((ctypes.c_ushort * n).from_address(data.value))
+            else:
+                value = ctypes.string_at(data.value, n)
+            return actual_type.value, fmt, value
+        finally:
+            _xlib.XFree(data)
+
+    def active_window(self):
+        _, value = self.get_property(self.root, "_NET_ACTIVE_WINDOW")
+        return value[0] if value else 0
+
+    def activate(self, window, timeout=0.5):
+        """Ask the window manager to focus window and wait until it has.
+
+        Waits on the FocusIn / _NET_ACTIVE_WINDOW change rather than a fixed
+        sleep. Call select_input(root, PropertyChangeMask) and
+        select_input(window, FocusChangeMask) once beforehand. Returns
+        False on timeout.
+        """
+        if self.active_window() == window:
+            return True
+        ev = XEvent()
+        msg = ev.xclient
+        msg.type = ClientMessage
+        msg.window = window
+        msg.message_type = self.atom("_NET_ACTIVE_WINDOW")
+        msg.format = 32
+        msg.data[0] = 2  # source indication: pager, which mutter never refuses
+        msg.data[1] = CurrentTime
+        _xlib.XSendEvent(self.dpy, self.root, 0,
+                         SubstructureRedirectMask | SubstructureNotifyMask, ctypes.byref(ev))
+        self.flush()
+        net_active = self.atom("_NET_ACTIVE_WINDOW")
+
+        def focused(ev):
+            if ev.type == FocusIn:
+                return ev.xfocus.window == window
+            return (ev.type == PropertyNotify and ev.xproperty.window == self.root
+                    and ev.xproperty.atom == net_active and self.active_window() == window)
+
+        return self.wait_for(focused, timeout) is not None
+
+    def keycode(self, name):
+        code = self._keycodes.get(name)
+        if code is None:
+            keysym = _xlib.XStringToKeysym(name.encode())
+            code = self._keycodes[name] = _xlib.XKeysymToKeycode(self.dpy, keysym)
+        return code
+
+    def _combo(self, combo):
+        *mods, key = combo.split("+")
+        mods = [MODIFIERS[m.lower()] for m in mods]
+        state = 0
+        for _, bit in mods:
+            state |= bit
+        return [self.keycode(name) for name, _ in mods], state, self.keycode(key)
+
+    def press(self, combo):
+        """Type a key combo like "ctrl+shift+v" into the focused window via XTest."""
+        if _xtst is None:
+            raise RuntimeError("libXtst not found")
+        mods, _, key = self._combo(combo)
+        for code in mods + [key]:
+            _xtst.XTestFakeKeyEvent(self.dpy, code, 1, 0)
+        for code in [key] + mods[::-1]:
+            _xtst.XTestFakeKeyEvent(self.dpy, code, 0, 0)
+        self.flush()
+
+    def press_in(self, window, combo):
+        """Send a key combo straight to window without focusing it.
+
+        These are synthetic (send_event) key events: GTK and Qt apps accept
+        them, but some — xterm, most games — ignore them.
+        """
+        mods, state, key = self._combo(combo)
+        ev = XEvent()
+        k = ev.xkey
+        k.window = window
+        k.root = self.root
+        k.same_screen = 1
+        k.state = state
+        k.keycode = key
+        for kind in (KeyPress, KeyRelease):
+            k.type = kind
+            _xlib.XSendEvent(self.dpy, window, 1, KeyPressMask | KeyReleaseMask, ctypes.byref(ev))
+        self.flush()
+
+    def wm_class(self, window):
+        """(res_name, res_class) — empty strings if the window has none."""
+        hint = XClassHint()
+        if not _xlib.XGetClassHint(self.dpy, window, ctypes.byref(hint)):
+            return "", ""
+        name = (hint.res_name or b"").decode(errors="replace")
+        cls = (hint.res_class or b"").decode(errors="replace")
+        for ptr in (XClassHint.res_name.offset, XClassHint.res_class.offset):
+            addr = ctypes.c_void_p.from_buffer(hint, ptr).value
+            if addr:
+                _xlib.XFree(addr)
+        return name, cls
+
+    def wm_name(self, window):
+        _, value = self.get_property(window, "_NET_WM_NAME")
+        if not value:
+            _, value = self.get_property(window, "WM_NAME")
+        return value.decode(errors="replace") if isinstance(value, bytes) else ""
+
+    def wm_pid(self, window):
+        _, value = self.get_property(window, "_NET_WM_PID")
+        return value[0] if value else 0
+
+
+class ClipboardWatcher:
+    """Event-driven clipboard: XFixes tells us when the owner changes.
+
+    Nothing is polled — the caller sleeps in Display.wait_event() until
+    is_change() matches, then read() fetches the text in-process with
+    XConvertSelection. own() makes us the clipboard owner for a piece of
+    text, so a paste into another window shows up as a SelectionRequest
+    (see is_transfer()) instead of something we have to sleep through.
+    """
+
+    def __init__(self, display, selection="CLIPBOARD"):
+        if _xfixes is None:
+            raise RuntimeError("libXfixes not found")
+        event_base, error_base = ctypes.c_int(), ctypes.c_int()
+        if not _xfixes.XFixesQueryExtension(display.dpy, ctypes.byref(event_base),
+                                            ctypes.byref(error_base)):
+            raise RuntimeError("X server lacks the XFIXES extension")
+        self.x = display
+        self.notify_type = event_base.value + XFixesSelectionNotify
+        self.selection = display.atom(selection)
+        self.window = _xlib.XCreateSimpleWindow(display.dpy, display.root, 0, 0, 1, 1, 0, 0, 0)
+        _xfixes.XFixesSelectSelectionInput(display.dpy, self.window, self.selection,
+                                           XFixesSetSelectionOwnerNotifyMask)
+        display.flush()
+        self.text = None  # bytes we are serving while we own the selection
+        self._text_targets = [display.atom(t) for t in ("UTF8_STRING", "TEXT", "STRING")]
+        display.filters.append(self._serve)
+
+    def is_change(self, ev):
+        return (ev.type == self.notify_type
+                and ev.xfixesselection.selection == self.selection
+                and ev.xfixesselection.subtype == XFixesSetSelectionOwnerNotify
+                and ev.xfixesselection.owner != self.window)
+
+    def own(self, text):
+        """Become the clipboard owner, serving text until someone else takes over."""
+        self.text = text.encode()
+        _xlib.XSetSelectionOwner(self.x.dpy, self.selection, self.window, CurrentTime)
+        if _xlib.XGetSelectionOwner(self.x.dpy, self.selection) != self.window:
+            self.text = None
+        return self.text is not None
+
+    def is_transfer(self, ev):
+        """True for a request we just answered with the text, i.e. a paste landed."""
+        return (ev.type == SelectionRequest and ev.xselectionrequest.owner == self.window
+                and ev.xselectionrequest.target in self._text_targets)
+
+    def _serve(self, ev):
+        """Display filter: answer clipboard requests while we own the selection.
+
+        Consumes SelectionClear and TARGETS queries; text transfers are
+        answered but passed through so callers can wait on is_transfer().
+        """
+        x = self.x
+        if ev.type == SelectionClear and ev.xselectionclear.window == self.window:
+            self.text = None
+            return True
+        if ev.type != SelectionRequest or ev.xselectionrequest.owner != self.window:
+            return False
+        req = ev.xselectionrequest
+        prop = req.property or req.target  # pre-ICCCM clients leave property unset
+        transfer = False
+        if self.text is None:
+            prop = 0
+        elif req.target == x.atom("TARGETS"):
+            targets = [x.atom("TARGETS")] + self._text_targets
+            data = (ctypes.c_ulong * len(targets))(*targets)
+            _xlib.XChangeProperty(x.dpy, req.requestor, prop, XA_ATOM, 32, PropModeReplace,
+                                  data, len(targets))
+        elif req.target in self._text_targets:
+            _xlib.XChangeProperty(x.dpy, req.requestor, prop, x.atom("UTF8_STRING"), 8,
+                                  PropModeReplace, self.text, len(self.text))
+            transfer = True
+        else:
+            prop = 0
+        reply = XEvent()
+        note = reply.xselection
+        note.type = SelectionNotify
+        note.requestor = req.requestor
+        note.selection = req.selection
+        note.target = req.target
+        note.property = prop
+        note.time = req.time
+        _xlib.XSendEvent(x.dpy, req.requestor, 0, NoEventMask, ctypes.byref(reply))
+        x.flush()
+        return not transfer
+
+    def read(self, timeout=1.0):
+        """Current clipboard text, or None if it can't be fetched in one go.
+
+        None covers "owner refused" and INCR transfers (large payloads);
+        callers fall back to xclip for those.
+        """
+        if self.text is not None:
+            return self.text.decode(errors="replace")
+        self._convert()
+        reply = self.x.wait_for(self._is_reply, timeout)
+        return None if reply is None else self._fetch(reply)
+
+    def watch(self, callback):
+        """Fetch the text on every owner change and pass it to callback(text, seen).
+
+        Runs as a Display filter, so changes are picked up even while the
+        caller is blocked elsewhere (e.g. mid-paste) and none are missed.
+        seen is the time.monotonic_ns() at which the change was noticed;
+        text is None where read() would return None.
+        """
+        self._callback = callback
+        self._requested = collections.deque()  # seen times of conversions in flight
+        self.x.filters.append(self._on_change)
+
+    def _on_change(self, ev):
+        if self.is_change(ev):
+            self._requested.append(time.monotonic_ns())
+            self._convert()
+            return True
+        if self._requested and self._is_reply(ev):
+            self._callback(self._fetch(ev), self._requested.popleft())
+            return True
+        return False
+
+    def _convert(self):
+        _xlib.XConvertSelection(self.x.dpy, self.selection, self.x.atom("UTF8_STRING"),
+                                self.x.atom("KYX11_CLIP"), self.window, CurrentTime)
+        self.x.flush()
+
+    def _is_reply(self, ev):
+        return ev.type == SelectionNotify and ev.xselection.requestor == self.window
+
+    def _fetch(self, reply):
+        if not reply.xselection.property:
+            return None
+        prop_type, _, value = self.x.get_property_typed(self.window, "KYX11_CLIP", delete=True,
+                                                        max_longs=1 << 20)
+        if prop_type == self.x.atom("INCR") or value is None:
+            return None
+        return value.decode(errors="replace")
@@ -0,0 +1,66 @@
+"""Drift checks for the timer engine under a stalled main loop.
+
+The engine takes explicit monotonic `now` values, so a fake clock can
+jump ahead the way a blocked main loop does between ticks.
+"""
+
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import kysettings  # noqa: E402
+
+USEC = kysettings.USEC
+START = 1_000 * USEC  # an arbitrary monotonic origin
+
+
+def stalled_ticks(start, end, tick=USEC // 10, stall_every=7, stall=2_345_678):
+    """Fake tick times: every `tick` µs, but every `stall_every`th tick
+    arrives `stall` µs late, as if a handler blocked the main loop."""
+    now = start
+    n = 0
+    while now < end:
+        n += 1
+        now += tick + (stall if n % stall_every == 0 else 0)
+        yield min(now, end)
+
+
+def test_countdown_ends_at_its_deadline_despite_stalls():
+    countdown = kysettings.Countdown("tea", 60 * USEC)
+    countdown.start(now=START)
+    deadline = START + 60 * USEC
+    for now in stalled_ticks(START, deadline):
+        assert countdown.remaining(now) == deadline - now
+    assert countdown.remaining(deadline - 1) == 1
+    assert countdown.remaining(deadline) == 0
+    assert countdown.remaining(deadline + 5 * USEC) == 0
+
+
+def test_paused_countdown_keeps_what_was_left():
+    countdown = kysettings.Countdown("", 30 * USEC)
+    countdown.start(now=START)
+    countdown.stop(now=START + 10 * USEC)
+    assert countdown.remaining(START + 500 * USEC) == 20 * USEC
+
+    resumed = START + 500 * USEC
+    countdown.start(now=resumed)
+    for now in stalled_ticks(resumed, resumed + 20 * USEC):
+        assert countdown.remaining(now) == resumed + 20 * USEC - now
+    assert countdown.remaining(resumed + 20 * USEC) == 0
+
+
+def test_stopwatch_elapsed_does_not_drift():
+    stopwatch = kysettings.Stopwatch()
+    stopwatch.start(now=START)
+    end = START + 90 * USEC
+    for now in stalled_ticks(START, end):
+        assert stopwatch.elapsed(now) == now - START
+    stopwatch.stop(now=end)
+    assert stopwatch.elapsed() == 90 * USEC
+
+    # Time spent stopped isn't counted, however long the stall
+    restart = end + 3_600 * USEC
+    stopwatch.start(now=restart)
+    for now in stalled_ticks(restart, restart + 30 * USEC):
+        assert stopwatch.elapsed(now) == 90 * USEC + now - restart
@@ -0,0 +1,35 @@
+"""The stall watchdog blames the handler the main loop dispatched."""
+
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import kysettings  # noqa: E402
+from kysettings import Gio, GLib  # noqa: E402
+
+
+def test_stall_is_attributed_to_the_dispatched_handler():
+    watchdog = kysettings.StallWatchdog(threshold_ms=50, source=__file__)
+    app = Gio.Application(flags=Gio.ApplicationFlags.NON_UNIQUE)
+
+    def slow_timeout():
+        time.sleep(0.3)
+        GLib.timeout_add(200, quit_app)  # after the watchdog has seen the next beat
+        return False
+
+    def quit_app():
+        app.release()
+        return False
+
+    def on_activate(app):
+        app.hold()
+        GLib.timeout_add(20, slow_timeout)
+
+    app.connect("activate", on_activate)
+    app.run([])  # PyGObject's Python override of run() sits under the handler
+
+    assert "slow_timeout" in watchdog.stalls
+    assert "run" not in watchdog.stalls
+    assert watchdog.stalls["slow_timeout"]["max_ms"] >= 200
@@ -6,6 +6,17 @@ if [ -f ~/.local/bin/pdanet-proxy ]; then
     sudo ~/.local/bin/pdanet-proxy stop 2>/dev/null || true
 fi
 
+# Quit the resident app
+gapplication action com.ky.settings quit 2>/dev/null || true
+
+# Remove the privileged helper
+sudo pkill -f /usr/local/lib/kysettings/kysettings-helper 2>/dev/null || true
+sudo rm -rf /usr/local/lib/kysettings
+sudo rm -f /usr/share/dbus-1/system-services/com.ky.settings.Helper.service
+sudo rm -f /usr/share/dbus-1/system.d/com.ky.settings.Helper.conf
+sudo rm -f /usr/share/polkit-1/actions/com.ky.settings.policy
+sudo systemctl reload dbus 2>/dev/null || true
+
 # Reset GNOME system proxy if it was set to PDANet
 MODE=$(gsettings get org.gnome.system.proxy mode 2>/dev/null)
 if [ "$MODE" = "'manual'" ]; then
@@ -25,22 +36,32 @@ fi
 rm -f ~/.proxy_env
 sudo rm -f /etc/apt/apt.conf.d/99pdanet-proxy 2>/dev/null || true
 
+# Stop and remove the supervised helper units
+systemctl --user disable --now kysettings-focus-audio.service 2>/dev/null || true
+systemctl --user stop 'kysettings-speech-lock@*.service' 2>/dev/null || true
+rm -f ~/.config/systemd/user/kysettings-focus-audio.service
+rm -f ~/.config/systemd/user/kysettings-speech-lock@.service
+systemctl --user daemon-reload 2>/dev/null || true
+
 # Remove binaries
 rm -f ~/.local/bin/kysettings
 rm -f ~/.local/bin/pdanet-proxy
 rm -f ~/.local/bin/pdanet
+pkill -f focus-audio 2>/dev/null || true
 pkill -f minecraft-auto-mute 2>/dev/null || true
-rm -f ~/.local/bin/minecraft-auto-mute.sh
+rm -f ~/.local/bin/focus-audio ~/.local/bin/minecraft-auto-mute ~/.local/bin/minecraft-auto-mute.sh
 pkill -f speech-lock 2>/dev/null || true
 rm -f ~/.local/bin/speech-lock
 rm -f ~/.local/bin/bt-reset
+rm -f ~/.local/bin/kyx11.py
 
 # Remove icon
 rm -f ~/.local/share/icons/hicolor/256x256/apps/com.ky.settings.png
 gtk-update-icon-cache ~/.local/share/icons/hicolor/ 2>/dev/null || true
 
-# Remove desktop entry
+# Remove desktop entry and D-Bus activation file
 rm -f ~/.local/share/applications/com.ky.settings.desktop
+rm -f ~/.local/share/dbus-1/services/com.ky.settings.service
 update-desktop-database ~/.local/share/applications/ 2>/dev/null || true
 
 # Remove config/first-run flag